@@ -1,34 +1,253 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_file
+from flask import Flask, Response, abort, g, has_app_context, render_template, request, jsonify, session, redirect, url_for, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+from flask_sqlalchemy.session import Session
+from sqlalchemy import and_, event, func, literal, or_, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import CompileError, IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
+import click
 import os
 import json
+import mimetypes
+import copy
+import gzip
+import re
 import secrets
+import shutil
+import sqlite3
 from datetime import datetime, timedelta
+import tempfile
 import zipfile
-from io import BytesIO
+import time
+import unicodedata
+from urllib.parse import quote
+from werkzeug.http import dump_options_header
 from werkzeug.utils import secure_filename
 import uuid
+import hashlib
+import zlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import orjson  # optional faster JSON for large project payloads
+except ImportError:
+    orjson = None
+
+try:
+    from PIL import Image, ImageOps  # optional; without it uploads get no responsive derivatives
+except ImportError:
+    Image = None
 
 app = Flask(__name__)
-app.config['SECRET_KEY'] = secrets.token_hex(32)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///website_builder.db'
+
+def load_secret_key():
+    """SECRET_KEY from the environment, else a key generated once and kept in the instance folder.
+
+    Every worker on the host then signs with the same key. Set SECRET_KEY
+    when running on more than one host.
+    """
+    if os.environ.get('SECRET_KEY'):
+        return os.environ['SECRET_KEY']
+    path = os.path.join(app.instance_path, 'secret_key')
+    if not os.path.exists(path):
+        os.makedirs(app.instance_path, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            f.write(secrets.token_hex(32))
+        os.chmod(tmp_path, 0o600)
+        try:
+            os.link(tmp_path, path)  # fails if another worker got there first; keep theirs
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    with open(path) as f:
+        return f.read().strip()
+
+app.config['SECRET_KEY'] = load_secret_key()
+app.config['SESSION_BACKEND'] = os.environ.get('SESSION_BACKEND', 'database')  # database or memory
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['FRAGMENT_CACHE_MAX_BYTES'] = 8 * 1024 * 1024  # 8MB of rendered HTML per worker
+app.config['EXPORT_FOLDER'] = 'exports'
+app.config['EXPORT_POOL_WORKERS'] = 2  # export processes per web worker
+app.config['EXPORT_JOB_TIMEOUT'] = 10 * 60  # queued jobs older than this are treated as lost
+app.config['BULK_EXPORT_MAX_PROJECTS'] = 100
+app.config['JSON_GZIP_MIN_BYTES'] = 1024  # project payloads at least this large are gzipped
+app.config['DASHBOARD_PAGE_SIZE'] = 24  # projects per dashboard page; the JSON listing allows up to 100
+app.config['REVISIONS_KEEP_RECENT'] = 50  # revisions kept regardless of age
+app.config['REVISIONS_KEEP_DAYS'] = 90  # older revisions are thinned to one per day, then dropped after this
+app.config['REVISION_BLOB_GRACE'] = timedelta(hours=1)  # unreferenced blobs younger than this are kept
+app.config['STATIC_ASSET_EXTENSIONS'] = ('.css', '.js')  # static files served under content-hashed URLs
+app.config['STATIC_ASSET_MAX_AGE'] = 365 * 24 * 3600  # fingerprinted URLs never change content
+app.config['STATIC_ASSET_FALLBACK_MAX_AGE'] = 60  # outdated fingerprints get the current file, briefly cached
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'}
 
+# Database Configuration
+def database_uri(uri):
+    """SQLAlchemy URI for a configured database; accepts Heroku-style postgres:// URIs"""
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(os.environ.get('DATABASE_URI', 'sqlite:///website_builder.db'))
+if os.environ.get('DATABASE_READ_URI'):
+    # Optional replica (or read-only SQLite connection) for views marked read_only_db
+    app.config['SQLALCHEMY_BINDS'] = {'read': database_uri(os.environ['DATABASE_READ_URI'])}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_pre_ping': True, 'pool_recycle': 3600}
+if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),  # connections kept open per worker
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    })
+# Applied to every new SQLite connection; an empty value leaves SQLite's default
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),  # readers no longer block the writer
+    'busy_timeout': os.environ.get('SQLITE_BUSY_TIMEOUT', '5000'),  # ms to wait for the write lock
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),  # safe with WAL, fsyncs at checkpoints
+}
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in app.config['SQLITE_PRAGMAS'].items():
+        if not value:
+            continue
+        try:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        except sqlite3.DatabaseError as e:
+            app.logger.warning('Could not set PRAGMA %s = %s: %s', name, value, e)
+    cursor.close()
+
+class RoutingSession(Session):
+    """Session that sends queries from read_only_db views to the 'read' bind.
+
+    Once the request flushes a write, the rest of it uses the primary so it
+    reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_app_context() and g.get('db_read_only')
+                and 'read' in self._db.engines):
+            return self._db.engines['read']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def leave_read_engine(session, flush_context):
+    if has_app_context():
+        g.db_read_only = False
+
 # Create upload folder if it doesn't exist
 import os
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
+if not os.path.exists(app.config['EXPORT_FOLDER']):
+    os.makedirs(app.config['EXPORT_FOLDER'])
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-db = SQLAlchemy(app)
+UPLOAD_EXTENSION_ALIASES = {'jpeg': 'jpg'}  # one stored name per content, whatever the upload was called
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+def upload_path(digest, ext):
+    """Path of an upload relative to UPLOAD_FOLDER, sharded on the first two bytes of its hash"""
+    return f'{digest[:2]}/{digest[2:4]}/{digest}.{ext}'
+
+def store_upload(stream, ext):
+    """Store an uploaded file under its sha256 and return its upload_path.
+
+    Identical files share one copy. Seekable streams (werkzeug keeps uploads
+    in memory or a spooled temp file) are hashed before anything is written,
+    so a duplicate costs no write at all. Other streams are copied to a temp
+    file while being hashed.
+    """
+    ext = UPLOAD_EXTENSION_ALIASES.get(ext, ext)
+    folder = app.config['UPLOAD_FOLDER']
+    digest = hashlib.sha256()
+    tmp = None
+    
+    if stream.seekable():
+        start = stream.tell()
+        for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        stream.seek(start)
+    else:
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix='.upload-')
+        with os.fdopen(fd, 'wb') as out:
+            for chunk in iter(lambda: stream.read(UPLOAD_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+    
+    filename = upload_path(digest.hexdigest(), ext)
+    path = os.path.join(folder, filename)
+    try:
+        # A new mtime restarts gc-uploads' grace period for the existing copy
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    else:
+        if tmp:
+            os.remove(tmp)
+        return filename
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if tmp is None:
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix='.upload-')
+        with os.fdopen(fd, 'wb') as out:
+            shutil.copyfileobj(stream, out, UPLOAD_CHUNK_SIZE)
+    os.chmod(tmp, 0o644)
+    # Concurrent uploads of the same file race to the same name with the same bytes
+    os.replace(tmp, path)
+    return filename
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+class CompressedJSON(db.TypeDecorator):
+    """JSON text stored as a format byte followed by zlib-compressed compact JSON.
+
+    Values are read and written as str, so callers keep using json.loads and
+    json.dumps. Rows written before compression (plain text, or bytes without
+    the format byte) are returned unchanged until compress-projects rewrites them.
+    """
+    impl = db.LargeBinary
+    cache_ok = True
+    FORMAT_ZLIB = b'\x01'
+
+    def load_dialect_impl(self, dialect):
+        # MySQL's plain BLOB stops at 64 KB
+        if dialect.name in ('mysql', 'mariadb'):
+            return dialect.type_descriptor(mysql.LONGBLOB())
+        return dialect.type_descriptor(self.impl)
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            value = json.dumps(json.loads(value), ensure_ascii=False, separators=(',', ':'))
+        except ValueError:
+            pass
+        return self.FORMAT_ZLIB + zlib.compress(value.encode('utf-8'))
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        value = bytes(value)
+        if value[:1] == self.FORMAT_ZLIB:
+            return zlib.decompress(value[1:]).decode('utf-8')
+        return value.decode('utf-8')
 
 # Database Models
 class User(db.Model):
@@ -50,10 +269,81 @@ class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    content = db.Column(db.Text, default='[]')
-    settings = db.Column(db.Text, default='{}')
+    content = db.Column(CompressedJSON, default='[]')
+    settings = db.Column(CompressedJSON, default='{}')
+    version = db.Column(db.Integer, default=1, nullable=False)  # bumped on every save; patches apply against it
+    content_hash = db.Column(db.String(64))  # sha256 of name, content and settings; see document_hash
+    uploads_indexed = db.Column(db.Boolean, default=False)  # upload_references reflect the saved content
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    export_jobs = db.relationship('ExportJob', backref='project', lazy=True, cascade='all, delete-orphan')
+    rendered_components = db.relationship('RenderedComponent', backref='project', lazy=True, cascade='all, delete-orphan')
+    revisions = db.relationship('ProjectRevision', backref='project', lazy=True, cascade='all, delete-orphan')
+    upload_references = db.relationship('UploadReference', backref='project', lazy=True, cascade='all, delete-orphan')
+    __table_args__ = (db.Index('ix_project_user_updated', 'user_id', 'updated_at', 'id'),)  # dashboard listing
+    # Updates run as UPDATE ... WHERE version = <version loaded>, so a save based on a row
+    # another worker has since changed fails with StaleDataError instead of overwriting it
+    __mapper_args__ = {'version_id_col': version, 'version_id_generator': False}
+
+class RevisionBlob(db.Model):
+    """Content-addressed JSON value (a component or a settings object) shared by all revisions"""
+    hash = db.Column(db.String(64), primary_key=True)  # sha256 of data
+    data = db.Column(db.Text, nullable=False)  # canonical JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)  # refreshed when a new revision reuses the blob
+    uploads_indexed = db.Column(db.Boolean, default=False)  # revision_upload rows exist for this blob
+
+class RevisionUpload(db.Model):
+    """An upload used by a revision blob; lets upload GC keep files that restoring a revision needs"""
+    id = db.Column(db.Integer, primary_key=True)
+    upload = db.Column(db.String(255), nullable=False, index=True)  # path relative to UPLOAD_FOLDER
+    blob_hash = db.Column(db.String(64), db.ForeignKey('revision_blob.hash'), nullable=False, index=True)
+    __table_args__ = (db.UniqueConstraint('upload', 'blob_hash'),)
+
+class ProjectRevision(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    version = db.Column(db.Integer)
+    name = db.Column(db.String(100))
+    component_hashes = db.Column(db.Text, default='[]')  # JSON list of RevisionBlob hashes, in page order
+    settings_hash = db.Column(db.String(64))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class UploadReference(db.Model):
+    """An upload used by a project's content or settings; see index_project_uploads"""
+    id = db.Column(db.Integer, primary_key=True)
+    upload = db.Column(db.String(255), nullable=False, index=True)  # path relative to UPLOAD_FOLDER
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    __table_args__ = (db.UniqueConstraint('upload', 'project_id'),)
+
+class RenderedComponent(db.Model):
+    """Persisted render of one component of a project, keyed by the component's id"""
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    component_id = db.Column(db.String(64), nullable=False)
+    html = db.Column(db.Text)
+    fingerprint = db.Column(db.String(64))  # RENDER_FINGERPRINT the html was rendered with
+    content_key = db.Column(db.String(64))  # FragmentCache.key of the component the html was rendered from
+    __table_args__ = (db.UniqueConstraint('project_id', 'component_id'),)
+
+class StoredSession(db.Model):
+    """Server-side session data; the cookie only carries the session id"""
+    id = db.Column(db.String(64), primary_key=True)  # sha256 of the session id, never the id itself
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class ExportJob(db.Model):
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    format = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), default='queued')  # queued, done, failed
+    project_updated_at = db.Column(db.DateTime)  # project version the artifact was built from
+    minify = db.Column(db.Boolean, default=False)
+    artifact_path = db.Column(db.String(255))
+    etag = db.Column(db.String(64))  # sha256 of the artifact
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
 
 # Subscription Limits
 SUBSCRIPTION_LIMITS = {
@@ -73,6 +363,200 @@ SUBSCRIPTION_LIMITS = {
     }
 }
 
+# Current User
+def current_user():
+    """The signed-in user, looked up at most once per request"""
+    if 'current_user' not in g:
+        user_id = session.get('user_id')
+        g.current_user = User.query.get(user_id) if user_id is not None else None
+    return g.current_user
+
+def project_count(user_id):
+    """Number of projects a user owns, counted from the (user_id, updated_at) index"""
+    return db.session.query(func.count(Project.id)).filter(Project.user_id == user_id).scalar()
+
+# Sessions
+class DatabaseSessionStore:
+    """Sessions in the stored_session table.
+
+    Every request reads its session row by primary key rather than from a
+    per-worker cache, so a logout or rotation in one worker revokes the
+    session in all of them immediately.
+    """
+
+    def load(self, key):
+        table = StoredSession.__table__
+        with db.engine.connect() as conn:
+            row = conn.execute(db.select(table.c.data, table.c.expires_at).where(table.c.id == key)).first()
+        if row is None or row.expires_at <= datetime.utcnow():
+            return None
+        return row.data, row.expires_at
+
+    def save(self, key, data, expires_at):
+        table = StoredSession.__table__
+        with db.engine.begin() as conn:
+            updated = conn.execute(
+                db.update(table).where(table.c.id == key).values(data=data, expires_at=expires_at)
+            ).rowcount
+            if not updated:
+                conn.execute(db.insert(table).values(id=key, data=data, expires_at=expires_at))
+
+    def delete(self, key):
+        table = StoredSession.__table__
+        with db.engine.begin() as conn:
+            conn.execute(db.delete(table).where(table.c.id == key))
+
+    def purge_expired(self):
+        table = StoredSession.__table__
+        with db.engine.begin() as conn:
+            return conn.execute(db.delete(table).where(table.c.expires_at <= datetime.utcnow())).rowcount
+
+class MemoryKVStore:
+    """In-process stand-in for a shared key-value store such as Redis (GET, SET with expiry, DEL).
+
+    It is only shared by the threads of one worker, so it suits development
+    and single-worker deployments.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def purge_expired(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+class KVSessionStore:
+    """Sessions in a key-value store; the store's own expiry drops old sessions"""
+
+    def __init__(self, kv, prefix='session:'):
+        self.kv = kv
+        self.prefix = prefix
+
+    def load(self, key):
+        value = self.kv.get(self.prefix + key)
+        if value is None:
+            return None
+        data, expires_at = json.loads(value)
+        return data, datetime.fromisoformat(expires_at)
+
+    def save(self, key, data, expires_at):
+        ttl = max((expires_at - datetime.utcnow()).total_seconds(), 1)
+        self.kv.set(self.prefix + key, json.dumps([data, expires_at.isoformat()]), ttl)
+
+    def delete(self, key):
+        self.kv.delete(self.prefix + key)
+
+    def purge_expired(self):
+        return self.kv.purge_expired() if hasattr(self.kv, 'purge_expired') else 0
+
+class ServerSideSession(SecureCookieSession):
+    def __init__(self, initial=None, sid=None, expires_at=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.stale_sid = None
+
+    def regenerate(self):
+        """Move the session to a new id, so an id planted before login is useless"""
+        if self.sid is not None:
+            self.stale_sid = self.sid
+            self.sid = None
+        self.modified = True
+
+class ServerSideSessionInterface(SessionInterface):
+    """Keep session data in a SESSION_BACKEND store; the cookie holds a random session id.
+
+    Unchanged sessions are only written back once half their lifetime has
+    passed, so ordinary requests cost one primary-key read and no write.
+    """
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def key(sid):
+        return hashlib.sha256(sid.encode('utf-8')).hexdigest()
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            record = self.store.load(self.key(sid))
+            if record is not None:
+                data, expires_at = record
+                try:
+                    return ServerSideSession(self.serializer.loads(data), sid, expires_at)
+                except ValueError:
+                    pass
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+        
+        if session.accessed:
+            response.vary.add('Cookie')
+        if session.stale_sid is not None:
+            self.store.delete(self.key(session.stale_sid))
+        
+        if not session:
+            if session.modified and session.sid is not None:
+                self.store.delete(self.key(session.sid))
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+            return
+        
+        lifetime = app.permanent_session_lifetime
+        now = datetime.utcnow()
+        if not (session.modified or session.sid is None or session.expires_at - now < lifetime / 2):
+            return
+        
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        session.expires_at = now + lifetime
+        self.store.save(self.key(session.sid), self.serializer.dumps(dict(session)), session.expires_at)
+        response.set_cookie(name, session.sid, expires=session.expires_at if session.permanent else None,
+                            httponly=httponly, domain=domain, path=path, secure=secure, samesite=samesite)
+        response.vary.add('Cookie')
+
+SESSION_STORES = {
+    'database': DatabaseSessionStore,
+    'memory': lambda: KVSessionStore(MemoryKVStore()),
+}
+app.session_interface = ServerSideSessionInterface(SESSION_STORES[app.config['SESSION_BACKEND']]())
+
+@app.cli.command('purge-sessions')
+def purge_sessions_command():
+    """Delete expired server-side sessions"""
+    print(f'Removed {app.session_interface.store.purge_expired()} expired sessions')
+
 # Decorators
 def login_required(f):
     @wraps(f)
@@ -82,24 +566,168 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def read_only_db(f):
+    """Serve the view's queries from DATABASE_READ_URI when one is configured"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
+
 def subscription_check(feature):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            user = User.query.get(session.get('user_id'))
+            user = current_user()
             if not user:
                 return jsonify({'error': 'Unauthorized'}), 401
             
             limits = SUBSCRIPTION_LIMITS[user.subscription_tier]
             
             if feature == 'project_limit':
-                if len(user.projects) >= limits['max_projects']:
+                if project_count(user.id) >= limits['max_projects']:
                     return jsonify({'error': 'Project limit reached. Upgrade to Pro for unlimited projects.'}), 403
             
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+# Static Assets
+FINGERPRINTED_NAME = re.compile(r'^(.+)\.[0-9a-f]{12}(\.[^./]+)$')
+
+class AssetManifest:
+    """Content-hashed names for the app's own stylesheets and scripts.
+
+    A fingerprinted URL changes whenever its file does, so browsers can cache
+    it forever and a deploy never leaves them running stale code. Each version
+    of an asset is copied, plain and gzipped, into the instance folder under its
+    fingerprinted name and served from there, so the bytes behind a URL never
+    change even while static/ is being replaced under a running release.
+    """
+    
+    def __init__(self, static_folder, cache_folder):
+        self.static_folder = static_folder
+        self.cache_folder = cache_folder
+        self.assets = {}  # static filename -> (fingerprinted name, mtime)
+        self.files = {}  # fingerprinted name -> static filename
+    
+    def build(self, skip=()):
+        """Fingerprint every matching file under the static folder, except the directories in skip"""
+        skip = {os.path.realpath(path) for path in skip}
+        for root, dirs, files in os.walk(self.static_folder):
+            dirs[:] = sorted(d for d in dirs if os.path.realpath(os.path.join(root, d)) not in skip)
+            for name in sorted(files):
+                if name.endswith(app.config['STATIC_ASSET_EXTENSIONS']):
+                    self.add(os.path.relpath(os.path.join(root, name), self.static_folder).replace(os.sep, '/'))
+        self.prune()
+    
+    def prune(self):
+        """Remove .part files left behind by workers that died while writing a copy.
+
+        Copies of earlier versions are kept: pages rendered by a node still on
+        an older release keep requesting them until that node is replaced.
+        """
+        for root, _, files in os.walk(self.cache_folder):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    # Another worker may still be writing a .part file; only old ones are abandoned
+                    if name.endswith('.part') and time.time() - os.path.getmtime(path) >= 3600:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
+    
+    def write_copy(self, path, data):
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.part'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+    
+    def add(self, filename):
+        path = os.path.join(self.static_folder, filename)
+        with open(path, 'rb') as f:
+            data = f.read()
+        base, ext = os.path.splitext(filename)
+        fingerprinted = f'{base}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+        
+        self.write_copy(self.copy_path(fingerprinted), data)
+        self.write_copy(self.gzip_path(fingerprinted), gzip.compress(data, compresslevel=9, mtime=0))
+        
+        previous = self.assets.get(filename)
+        if previous:
+            self.files.pop(previous[0], None)
+        self.assets[filename] = (fingerprinted, os.path.getmtime(path))
+        self.files[fingerprinted] = filename
+    
+    def copy_path(self, fingerprinted):
+        return os.path.join(self.cache_folder, fingerprinted)
+    
+    def gzip_path(self, fingerprinted):
+        return self.copy_path(fingerprinted) + '.gz'
+    
+    def resolve(self, fingerprinted):
+        """Static filename a fingerprinted name belongs to, or None for unknown assets"""
+        if fingerprinted in self.files:
+            return self.files[fingerprinted]
+        # Another release's fingerprint of a known asset, say from a page
+        # rendered by a node on the previous or the next release
+        match = FINGERPRINTED_NAME.match(fingerprinted)
+        if match and match.group(1) + match.group(2) in self.assets:
+            return match.group(1) + match.group(2)
+        return None
+    
+    def lookup(self, filename):
+        """Fingerprinted name for a static file, or None when it is not fingerprinted"""
+        asset = self.assets.get(filename)
+        if asset and app.debug:
+            # Pick up edits while developing without restarting the server
+            try:
+                if os.path.getmtime(os.path.join(self.static_folder, filename)) != asset[1]:
+                    self.add(filename)
+                    asset = self.assets[filename]
+            except FileNotFoundError:
+                pass
+        return asset[0] if asset else None
+
+asset_manifest = AssetManifest(app.static_folder, os.path.join(app.instance_path, 'assets'))
+asset_manifest.build(skip=[app.config['UPLOAD_FOLDER']])
+
+@app.template_global()
+def asset_url(filename):
+    """URL for a static file, fingerprinted when the manifest knows it"""
+    fingerprinted = asset_manifest.lookup(filename)
+    if fingerprinted is None:
+        return url_for('static', filename=filename)
+    return url_for('fingerprinted_asset', filename=fingerprinted)
+
+@app.route('/assets/<path:filename>')
+def fingerprinted_asset(filename):
+    source = asset_manifest.resolve(filename)
+    if source is None:
+        abort(404)
+    
+    mimetype = mimetypes.guess_type(source)[0]
+    copy_path = asset_manifest.copy_path(filename)
+    if not os.path.exists(copy_path):
+        # No release on this host built that version. Serve today's file rather
+        # than break the page, but only cache it briefly: its content does not
+        # match the URL's fingerprint
+        return send_file(os.path.join(app.static_folder, source), mimetype=mimetype,
+                         max_age=app.config['STATIC_ASSET_FALLBACK_MAX_AGE'])
+    
+    max_age = app.config['STATIC_ASSET_MAX_AGE']
+    gzip_path = asset_manifest.gzip_path(filename)
+    if 'gzip' in request.accept_encodings and os.path.exists(gzip_path):
+        response = send_file(gzip_path, mimetype=mimetype, etag=f'{filename}-gz', max_age=max_age)
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_file(copy_path, mimetype=mimetype, etag=filename, max_age=max_age)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
 # Routes
 @app.route('/')
 def index():
@@ -146,6 +774,7 @@ def login():
         user = User.query.filter_by(username=username).first()
         
         if user and user.check_password(password):
+            session.regenerate()
             session.permanent = True
             session['user_id'] = user.id
             session['username'] = user.username
@@ -163,20 +792,27 @@ def logout():
 
 @app.route('/dashboard')
 @login_required
+@read_only_db
 def dashboard():
-    user = User.query.get(session['user_id'])
-    projects = Project.query.filter_by(user_id=user.id).order_by(Project.updated_at.desc()).all()
+    user = current_user()
+    try:
+        after = parse_listing_cursor(request.args.get('after'))
+    except ValueError:
+        after = None
+    projects, next_cursor = project_listing(user.id, after, app.config['DASHBOARD_PAGE_SIZE'])
     limits = SUBSCRIPTION_LIMITS[user.subscription_tier]
-    return render_template('dashboard.html', user=user, projects=projects, limits=limits)
+    return render_template('dashboard.html', user=user, projects=projects, project_count=project_count(user.id),
+                           next_cursor=next_cursor, first_page=after is None, limits=limits)
 
 @app.route('/builder/<int:project_id>')
 @login_required
+@read_only_db
 def builder(project_id):
     project = Project.query.get_or_404(project_id)
     if project.user_id != session['user_id']:
         return redirect(url_for('dashboard'))
     
-    user = User.query.get(session['user_id'])
+    user = current_user()
     limits = SUBSCRIPTION_LIMITS[user.subscription_tier]
     return render_template('builder.html', project=project, limits=limits)
 
@@ -185,6 +821,28 @@ def pricing():
     return render_template('pricing.html')
 
 # API Routes
+@app.route('/api/projects', methods=['GET'])
+@login_required
+@read_only_db
+def list_projects():
+    try:
+        after = parse_listing_cursor(request.args.get('after'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    limit = min(max(request.args.get('limit', app.config['DASHBOARD_PAGE_SIZE'], type=int), 1), 100)
+    projects, next_cursor = project_listing(session['user_id'], after, limit)
+    return jsonify({
+        'projects': [{
+            'id': project.id,
+            'name': project.name,
+            'version': project.version,
+            'created_at': project.created_at.isoformat() if project.created_at else None,
+            'updated_at': project.updated_at.isoformat() if project.updated_at else None
+        } for project in projects],
+        'next_cursor': next_cursor
+    })
+
 @app.route('/api/projects', methods=['POST'])
 @login_required
 @subscription_check('project_limit')
@@ -200,17 +858,40 @@ def create_project():
 
 @app.route('/api/projects/<int:project_id>', methods=['GET'])
 @login_required
+@read_only_db
 def get_project(project_id):
-    project = Project.query.get_or_404(project_id)
-    if project.user_id != session['user_id']:
+    # Check ownership and the version before loading the content columns,
+    # so a revalidation that ends in 304 never reads or decompresses them
+    owner_id, version = Project.query.with_entities(Project.user_id, Project.version) \
+        .filter_by(id=project_id).first_or_404()
+    if owner_id != session['user_id']:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    return jsonify({
-        'id': project.id,
-        'name': project.name,
-        'content': project.content,
-        'settings': project.settings
-    })
+    # The gzipped body is a different representation, so it gets its own ETag
+    etag = f'project-{project_id}-{version}'
+    matched = next((tag for tag in (etag, f'{etag}-gz') if request.if_none_match.contains(tag)), None)
+    if matched:
+        response = Response(status=304)
+        response.set_etag(matched)
+    else:
+        project = Project.query.get(project_id)
+        body = json_bytes({
+            'id': project.id,
+            'name': project.name,
+            'content': json_value(project.content or '[]'),
+            'settings': json_value(project.settings or '{}'),
+            'version': project.version
+        })
+        etag = f'project-{project_id}-{project.version}'
+        response = Response(body, mimetype='application/json')
+        if len(body) >= app.config['JSON_GZIP_MIN_BYTES'] and 'gzip' in request.accept_encodings:
+            response.set_data(gzip.compress(body, compresslevel=6))
+            response.headers['Content-Encoding'] = 'gzip'
+            etag = f'{etag}-gz'
+        response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 @app.route('/api/projects/<int:project_id>', methods=['PUT'])
 @login_required
@@ -221,24 +902,80 @@ def update_project(project_id):
     
     data = request.json
     
+    state = {
+        'name': project.name,
+        'content': project.content,
+        'settings': project.settings,
+        'version': project.version,
+        'content_hash': project.content_hash
+    }
+    
+    # Optimistic concurrency: a save based on an older version is rejected
+    # instead of overwriting newer work. Patches must always say their base.
+    if 'version' in data or 'patch' in data:
+        if data.get('version') != state['version']:
+            return jsonify({'error': 'Project has changed since this version', 'version': state['version']}), 409
+    
+    if 'patch' in data:
+        # Delta save: apply JSON patch operations to the stored document
+        stored = {
+            'name': state['name'],
+            'components': json.loads(state['content']),
+            'settings': json.loads(state['settings'])
+        }
+        document = copy.deepcopy(stored)
+        try:
+            apply_json_patch(document, data['patch'])
+            if not isinstance(document.get('name'), str) or not isinstance(document.get('components'), list) \
+                    or not isinstance(document.get('settings'), dict) or len(document) != 3:
+                raise JsonPatchError('patched document must keep name, components and settings')
+        except JsonPatchError as e:
+            return jsonify({'error': f'Invalid patch: {e}'}), 400
+        
+        data = {}
+        if document['name'] != stored['name']:
+            data['name'] = document['name']
+        if document['components'] != stored['components']:
+            data['content'] = json.dumps(document['components'])
+        if document['settings'] != stored['settings']:
+            data['settings'] = json.dumps(document['settings'])
+    
+    changes = {}
+    
     if 'name' in data:
-        project.name = data['name'].strip()
+        changes['name'] = data['name'].strip()
     
     if 'content' in data:
-        user = User.query.get(session['user_id'])
+        user = current_user()
         limits = SUBSCRIPTION_LIMITS[user.subscription_tier]
         
-        components = json.loads(data['content'])
+        try:
+            components = json.loads(data['content'])
+        except (TypeError, ValueError):
+            components = None
+        if not isinstance(components, list) or not all(isinstance(component, dict) for component in components):
+            return jsonify({'error': 'Content must be a list of component objects'}), 400
         if len(components) > limits['max_components_per_page']:
             return jsonify({'error': f'Component limit exceeded. {user.subscription_tier.title()} tier allows {limits["max_components_per_page"]} components.'}), 403
         
-        project.content = data['content']
+        changes['content'] = data['content']
     
     if 'settings' in data:
-        project.settings = data['settings']
+        changes['settings'] = data['settings']
     
-    db.session.commit()
-    return jsonify({'success': True})
+    # Skip the write entirely when the save changes nothing
+    old_hash = state['content_hash'] or document_hash(state['name'], state['content'], state['settings'])
+    new_state = dict(state, **changes)
+    new_hash = document_hash(new_state['name'], new_state['content'], new_state['settings'])
+    if new_hash == old_hash:
+        return jsonify({'success': True, 'version': state['version']})
+    
+    changes['content_hash'] = new_hash
+    changes['version'] = state['version'] + 1
+    if not commit_project_changes(project, changes):
+        version = db.session.query(Project.version).filter_by(id=project_id).scalar()
+        return jsonify({'error': 'Project has changed since this version', 'version': version}), 409
+    return jsonify({'success': True, 'version': changes['version']})
 
 @app.route('/api/projects/<int:project_id>', methods=['DELETE'])
 @login_required
@@ -247,18 +984,96 @@ def delete_project(project_id):
     if project.user_id != session['user_id']:
         return jsonify({'error': 'Unauthorized'}), 403
     
+    for job in project.export_jobs:
+        remove_export_artifact(job)
     db.session.delete(project)
     db.session.commit()
     return jsonify({'success': True})
 
+@app.route('/api/projects/<int:project_id>/revisions')
+@login_required
+@read_only_db
+def list_revisions(project_id):
+    project = Project.query.get_or_404(project_id)
+    if project.user_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    revisions = ProjectRevision.query.filter_by(project_id=project.id).order_by(ProjectRevision.id.desc()).all()
+    return jsonify({'revisions': [revision_json(revision) for revision in revisions]})
+
+@app.route('/api/projects/<int:project_id>/revisions/<int:revision_id>')
+@login_required
+@read_only_db
+def get_revision(project_id, revision_id):
+    revision = ProjectRevision.query.get_or_404(revision_id)
+    if revision.project_id != project_id or revision.project.user_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    components, settings = load_revision(revision)
+    return jsonify(dict(revision_json(revision), components=components, settings=settings))
+
+@app.route('/api/projects/<int:project_id>/revisions/<int:revision_id>/diff')
+@login_required
+@read_only_db
+def diff_revision(project_id, revision_id):
+    revision = ProjectRevision.query.get_or_404(revision_id)
+    if revision.project_id != project_id or revision.project.user_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    # Compare against ?against=<revision id>, or the revision before this one
+    against_id = request.args.get('against', type=int)
+    if against_id is not None:
+        base = ProjectRevision.query.get_or_404(against_id)
+        if base.project_id != project_id:
+            return jsonify({'error': 'Revision belongs to another project'}), 400
+    else:
+        base = ProjectRevision.query.filter(
+            ProjectRevision.project_id == project_id,
+            ProjectRevision.id < revision.id
+        ).order_by(ProjectRevision.id.desc()).first()
+    
+    return jsonify(diff_revisions(base, revision))
+
+@app.route('/api/projects/<int:project_id>/revisions/<int:revision_id>/restore', methods=['POST'])
+@login_required
+def restore_revision(project_id, revision_id):
+    revision = ProjectRevision.query.get_or_404(revision_id)
+    if revision.project_id != project_id or revision.project.user_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    project = revision.project
+    components, settings = load_revision(revision)
+    
+    user = current_user()
+    limits = SUBSCRIPTION_LIMITS[user.subscription_tier]
+    if len(components) > limits['max_components_per_page']:
+        return jsonify({'error': f'Component limit exceeded. {user.subscription_tier.title()} tier allows {limits["max_components_per_page"]} components.'}), 403
+    
+    content = json.dumps(components)
+    settings = json.dumps(settings)
+    content_hash = document_hash(revision.name, content, settings)
+    if content_hash != (project.content_hash or document_hash(project.name, project.content, project.settings)):
+        saved = commit_project_changes(project, {
+            'name': revision.name,
+            'content': content,
+            'settings': settings,
+            'content_hash': content_hash,
+            'version': project.version + 1
+        })
+        if not saved:
+            version = db.session.query(Project.version).filter_by(id=project_id).scalar()
+            return jsonify({'error': 'Project has changed since this version', 'version': version}), 409
+    return jsonify({'success': True, 'version': project.version})
+
 @app.route('/api/export/<int:project_id>/<format>')
 @login_required
+@read_only_db
 def export_project(project_id, format):
     project = Project.query.get_or_404(project_id)
     if project.user_id != session['user_id']:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    user = User.query.get(session['user_id'])
+    user = current_user()
     limits = SUBSCRIPTION_LIMITS[user.subscription_tier]
     
     if format not in limits['export_formats']:
@@ -267,47 +1082,35 @@ def export_project(project_id, format):
     components = json.loads(project.content)
     settings = json.loads(project.settings)
     
+    minify = bool(request.args.get('minify'))
+    
     if format == 'html':
-        html = generate_html(components, settings)
-        return jsonify({'html': html})
+        if request.args.get('stream'):
+            # Send the page as chunked text/html, one component at a time.
+            # The ETag is derived from the inputs so a match never renders.
+            etag = render_etag(components, settings, minify)
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                fragments = project_fragments(project, components)
+                response = Response(iter_html(components, settings, minify=minify, fragments=fragments),
+                                    mimetype='text/html')
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        html = generate_html(components, settings, minify, project_fragments(project, components))
+        response = jsonify({'html': html})
+        response.add_etag()
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     
     elif format == 'zip':
-        # Create a complete package
-        memory_file = BytesIO()
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            # HTML
-            html = generate_html(components, settings)
-            zf.writestr('index.html', html)
-            
-            # CSS
-            css = generate_css(components, settings)
-            zf.writestr('styles.css', css)
-            
-            # JS
-            js = generate_js(components, settings)
-            zf.writestr('script.js', js)
-            
-            # README
-            readme = f"""# {project.name}
-
-Created with Website Builder
-
-## Files
-- index.html - Main HTML file
-- styles.css - Stylesheet
-- script.js - JavaScript functionality
-
-## Usage
-Open index.html in your browser or deploy to any web hosting service.
-"""
-            zf.writestr('README.md', readme)
-        
-        memory_file.seek(0)
-        return send_file(
-            memory_file,
+        # Stream a complete package without building it in memory first
+        return Response(
+            iter_zip(zip_entries(project, components, settings, minify, project_fragments(project, components))),
             mimetype='application/zip',
-            as_attachment=True,
-            download_name=f'{project.name.replace(" ", "_")}.zip'
+            headers={'Content-Disposition': content_disposition(f'{project.name.replace(" ", "_")}.zip')}
         )
     
     elif format == 'react':
@@ -320,6 +1123,125 @@ Open index.html in your browser or deploy to any web hosting service.
     
     return jsonify({'error': 'Invalid format'}), 400
 
+@app.route('/api/export/<int:project_id>/<format>/jobs', methods=['POST'])
+@login_required
+def create_export_job(project_id, format):
+    project = Project.query.get_or_404(project_id)
+    if project.user_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    user = current_user()
+    limits = SUBSCRIPTION_LIMITS[user.subscription_tier]
+    
+    if format not in limits['export_formats']:
+        return jsonify({'error': f'{format.upper()} export requires Pro subscription'}), 403
+    
+    if format not in EXPORT_ARTIFACTS:
+        return jsonify({'error': 'Invalid format'}), 400
+    
+    minify = bool(request.args.get('minify'))
+    
+    # Reuse a job built from the current version of the project; anything
+    # older, failed or stuck in the queue is cleared out
+    cutoff = datetime.utcnow() - timedelta(seconds=app.config['EXPORT_JOB_TIMEOUT'])
+    for job in ExportJob.query.filter_by(project_id=project.id, format=format, minify=minify).all():
+        if job.project_updated_at == project.updated_at:
+            if job.status == 'done' or (job.status == 'queued' and job.created_at > cutoff):
+                return jsonify(export_job_json(job))
+        elif job.status == 'queued' and job.created_at > cutoff:
+            continue
+        remove_export_artifact(job)
+        db.session.delete(job)
+    
+    job = ExportJob(project_id=project.id, user_id=user.id, format=format, minify=minify,
+                    project_updated_at=project.updated_at)
+    db.session.add(job)
+    db.session.commit()
+    
+    submit_export_job(job, project)
+    return jsonify(export_job_json(job)), 202
+
+@app.route('/api/export/bulk', methods=['POST'])
+@login_required
+@read_only_db
+def bulk_export():
+    user = current_user()
+    limits = SUBSCRIPTION_LIMITS[user.subscription_tier]
+    
+    if 'zip' not in limits['export_formats']:
+        return jsonify({'error': 'Bulk export requires Pro subscription'}), 403
+    
+    # Accept a JSON body from API clients or a plain form post from the dashboard
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    project_ids = data.get('project_ids') or request.form.getlist('project_ids')
+    minify = bool(data.get('minify') or request.form.get('minify'))
+    
+    try:
+        if not isinstance(project_ids, list):
+            raise TypeError
+        project_ids = list(dict.fromkeys(int(project_id) for project_id in project_ids))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'project_ids must be a list of project IDs'}), 400
+    
+    if not project_ids:
+        return jsonify({'error': 'No projects selected'}), 400
+    
+    if len(project_ids) > app.config['BULK_EXPORT_MAX_PROJECTS']:
+        return jsonify({'error': f'Bulk export is limited to {app.config["BULK_EXPORT_MAX_PROJECTS"]} projects'}), 400
+    
+    projects = db.session.query(Project.id, Project.name).filter(
+        Project.id.in_(project_ids), Project.user_id == user.id
+    ).all()
+    if len(projects) != len(project_ids):
+        return jsonify({'error': 'Project not found'}), 404
+    
+    # Render in the process pool; each project's content is only loaded when its
+    # render is submitted, and the archive is written as results come back
+    tasks = [(f'{secure_filename(name) or "project"}-{project_id}', project_id) for project_id, name in projects]
+    return Response(
+        stream_with_context(iter_zip(iter_bulk_export_entries(tasks, minify))),
+        mimetype='application/zip',
+        headers={'Content-Disposition': content_disposition(f'{user.username}_projects.zip')}
+    )
+
+@app.route('/api/export/jobs/<job_id>')
+@login_required
+@read_only_db
+def get_export_job(job_id):
+    job = ExportJob.query.get_or_404(job_id)
+    if job.user_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify(export_job_json(job))
+
+@app.route('/api/export/jobs/<job_id>/result')
+@login_required
+@read_only_db
+def get_export_job_result(job_id):
+    job = ExportJob.query.get_or_404(job_id)
+    if job.user_id != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    if job.status != 'done':
+        return jsonify({'error': 'Export is not ready', 'status': job.status}), 409
+    
+    extension, mimetype = EXPORT_ARTIFACTS[job.format]
+    download_name = f'{job.project.name.replace(" ", "_")}.{extension}'
+    
+    # Serve the precompressed copy when there is one and the client takes gzip
+    gzip_path = job.artifact_path + '.gz'
+    if 'gzip' in request.accept_encodings and os.path.exists(gzip_path):
+        response = send_file(gzip_path, mimetype=mimetype, as_attachment=True,
+                             download_name=download_name, etag=f'{job.etag}-gz')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_file(job.artifact_path, mimetype=mimetype, as_attachment=True,
+                             download_name=download_name, etag=job.etag)
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/api/upload', methods=['POST'])
 @login_required
 def upload_file():
@@ -332,16 +1254,16 @@ def upload_file():
         return jsonify({'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
-        # Generate unique filename
         ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = f"{uuid.uuid4().hex}.{ext}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+        filename = store_upload(file.stream, ext)
+        manifest = submit_image_derivatives(filename)
         
-        file.save(filepath)
-        
-        # Return URL path
+        # Return URL path; the thumbnail is the original until its derivatives are built
         file_url = url_for('static', filename=f'uploads/{filename}', _external=False)
-        return jsonify({'url': file_url})
+        thumbnail = file_url
+        if manifest and IMAGE_THUMBNAIL_WIDTH in manifest['widths']:
+            thumbnail = url_for('static', filename=f'uploads/{derivative_name(filename, IMAGE_THUMBNAIL_WIDTH)}')
+        return jsonify({'url': file_url, 'thumbnail': thumbnail})
     
     return jsonify({'error': 'Invalid file type. Allowed: png, jpg, jpeg, gif, webp, svg'}), 400
 
@@ -397,29 +1319,54 @@ def admin_subscription_change():
         return redirect('/dashboard')
     return redirect('/admin/subscription')
 
+@app.route('/admin/cache/stats')
+@login_required
+def admin_cache_stats():
+    return jsonify({'fragment_cache': fragment_cache.stats()})
+
 # Helper Functions
-def generate_html(components, settings):
+def generate_html(components, settings, minify=False, fragments=None):
     """Generate complete HTML from components"""
-    html = f"""<!DOCTYPE html>
+    return ''.join(iter_html(components, settings, minify=minify, fragments=fragments))
+
+def iter_html(components, settings, stylesheet=None, minify=False, fragments=None):
+    """Yield the HTML document piece by piece, optionally minified"""
+    for chunk in iter_document(components, settings, stylesheet, fragments):
+        yield minify_html(chunk) if minify else chunk
+
+def iter_document(components, settings, stylesheet=None, fragments=None):
+    """Yield the head and CSS, each component, then the closing tags.
+
+    With a stylesheet path the head links to it instead of inlining the CSS.
+    fragments, from project_fragments, supplies already rendered components;
+    None entries are rendered through the fragment cache.
+    """
+    if stylesheet:
+        styles = f'    <link rel="stylesheet" href="{stylesheet}">'
+    else:
+        styles = f"""    <style>
+{generate_inline_css(components, settings)}
+    </style>"""
+    
+    yield f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{settings.get('title', 'My Website')}</title>
-    <style>
-{generate_inline_css(components, settings)}
-    </style>
+{styles}
 </head>
 <body>
 """
     
-    for component in components:
-        html += render_component(component)
+    if fragments is None:
+        fragments = [None] * len(components)
+    for component, fragment in zip(components, fragments):
+        yield fragment if fragment is not None else fragment_cache.render(component)
     
-    html += """
+    yield """
 </body>
 </html>"""
-    return html
 
 def generate_inline_css(components, settings):
     """Generate CSS for components"""
@@ -489,18 +1436,231 @@ def generate_inline_css(components, settings):
     """
     return css
 
+# Image Derivatives
+IMAGE_THUMBNAIL_WIDTH = 160
+IMAGE_DERIVATIVE_WIDTHS = (IMAGE_THUMBNAIL_WIDTH, 480, 960, 1600)
+UPLOADED_IMAGE_URL = re.compile(r'^/static/uploads/([0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64})\.(jpg|png|webp)$')
+UPLOADED_IMAGE_REFERENCE = re.compile(r'/static/uploads/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.(?:jpg|png|webp)')
+image_manifests = {}  # upload_path -> manifest; trusted only while its file exists, as gc-uploads may remove it
+
+def derivative_name(filename, width):
+    base, ext = filename.rsplit('.', 1)
+    return f'{base}-{width}w.{ext}'
+
+def manifest_name(filename):
+    return filename.rsplit('.', 1)[0] + '.json'
+
+def plan_image_derivatives(filename):
+    """Return the manifest an upload will get, or None if it gets no derivatives.
+
+    Only the image header is read, so this is cheap enough for the upload
+    request. The manifest is not written here: build_image_derivatives
+    publishes it once every file it lists exists.
+    """
+    if Image is None or not UPLOADED_IMAGE_URL.match(f'/static/uploads/{filename}'):
+        return None
+    folder = app.config['UPLOAD_FOLDER']
+    try:
+        with Image.open(os.path.join(folder, filename)) as img:
+            width, height = img.size
+            if img.getexif().get(0x0112) in (5, 6, 7, 8):  # EXIF orientation turns the image sideways
+                width, height = height, width
+            animated = getattr(img, 'is_animated', False)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    
+    widths = [w for w in IMAGE_DERIVATIVE_WIDTHS if w < width]
+    if animated or not widths:
+        return None
+    return {'width': width, 'height': height, 'widths': widths}
+
+def publish_image_manifest(folder, filename, manifest):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.join(folder, filename)), prefix='.manifest-')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(manifest, f)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, os.path.join(folder, manifest_name(filename)))
+
+def build_image_derivatives(folder, filename, manifest):
+    """Resize an upload to each width beside the original, then publish its manifest.
+
+    Runs inside the export process pool. Renderers only emit srcset for a
+    published manifest, so they never point at a file that does not exist,
+    and a failed build simply leaves the image without one.
+    """
+    with Image.open(os.path.join(folder, filename)) as source:
+        image_format = source.format
+        img = ImageOps.exif_transpose(source)
+        options = {
+            'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+            'WEBP': {'quality': 80, 'method': 4},
+            'PNG': {'optimize': True},
+        }.get(image_format, {})
+        for width in manifest['widths']:
+            path = os.path.join(folder, derivative_name(filename, width))
+            if os.path.exists(path):
+                continue
+            resized = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.derivative-')
+            os.close(fd)
+            try:
+                resized.save(tmp, format=image_format, **options)
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+    publish_image_manifest(folder, filename, manifest)
+    return filename
+
+def submit_image_derivatives(filename):
+    """Queue an upload's derivatives on the process pool; returns its manifest once published, else None"""
+    folder = app.config['UPLOAD_FOLDER']
+    _, manifest = image_manifest(f'/static/uploads/{filename}')
+    if manifest is not None:
+        return manifest
+    manifest = plan_image_derivatives(filename)
+    if manifest is None:
+        return None
+    
+    def finished(future):
+        if future.exception() is not None:
+            app.logger.error('Image derivatives failed for %s: %s', filename, future.exception())
+    
+    get_export_pool().submit(build_image_derivatives, folder, filename, manifest).add_done_callback(finished)
+    return None
+
+def image_manifest(src):
+    """(upload_path, manifest) for an uploaded image URL; (None, None) for any other URL"""
+    match = UPLOADED_IMAGE_URL.match(src or '')
+    if not match:
+        return None, None
+    filename = f'{match.group(1)}.{match.group(2)}'
+    path = os.path.join(app.config['UPLOAD_FOLDER'], manifest_name(filename))
+    manifest = image_manifests.get(filename)
+    if manifest is not None and os.path.exists(path):
+        return filename, manifest
+    
+    # Not seen yet, or collected since; a re-upload publishes the manifest again
+    image_manifests.pop(filename, None)
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return filename, None
+    image_manifests[filename] = manifest
+    return filename, manifest
+
+def image_manifest_state(text):
+    """Published derivative widths of each uploaded image a text mentions, None while unpublished"""
+    return [(src, (image_manifest(src)[1] or {}).get('widths'))
+            for src in sorted(set(UPLOADED_IMAGE_REFERENCE.findall(text)))]
+
+def responsive_image_attrs(src, sizes):
+    """srcset, sizes and lazy loading attributes for an uploaded image; empty for other URLs"""
+    filename, manifest = image_manifest(src)
+    if filename is None:
+        return ''
+    if manifest is None:
+        return ' loading="lazy"'
+    candidates = [f'/static/uploads/{derivative_name(filename, w)} {w}w' for w in manifest['widths']]
+    candidates.append(f'{src} {manifest["width"]}w')
+    return f' srcset="{", ".join(candidates)}" sizes="{sizes}" loading="lazy"'
+
+# Component Renderers
+COMPONENT_RENDERERS = {}
+
+def register_component(comp_type):
+    """Register a renderer function for a component type"""
+    def decorator(f):
+        COMPONENT_RENDERERS[comp_type] = f
+        return f
+    return decorator
+
 def render_component(component):
     """Render individual component to HTML"""
-    comp_type = component.get('type')
-    data = component.get('data', {})
-    
-    if comp_type == 'hero':
-        bg = 'linear-gradient(135deg, ' + data.get('gradientStart', '#667eea') + ', ' + data.get('gradientEnd', '#764ba2') + ')' if data.get('backgroundType') == 'gradient' else data.get('background', '#f5f5f5')
-        text_color = data.get('textColor', '#1a1a1a')
-        button_color = data.get('buttonColor', '#0066cc')
-        button_text_color = data.get('buttonTextColor', '#ffffff')
-        
-        return f"""
+    renderer = COMPONENT_RENDERERS.get(component.get('type'))
+    if renderer is None:
+        return ''
+    return renderer(component.get('data', {}))
+
+class FragmentCache:
+    """LRU cache of rendered component HTML, keyed by a hash of (type, data) and its images' manifests"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(component):
+        payload = json.dumps([component.get('type'), component.get('data', {})],
+                             sort_keys=True, separators=(',', ':'), default=str)
+        # Images gain a srcset once their derivatives are published, which changes the render
+        payload += json.dumps(image_manifest_state(payload))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def render(self, component, key=None):
+        key = key or self.key(component)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        fragment = render_component(component)
+        self.put(key, fragment)
+        return fragment
+
+    def put(self, key, fragment):
+        size = len(fragment.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._entries[key] = (fragment, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self.size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+fragment_cache = FragmentCache(app.config['FRAGMENT_CACHE_MAX_BYTES'])
+
+@register_component('hero')
+def render_hero(data):
+    bg = 'linear-gradient(135deg, ' + data.get('gradientStart', '#667eea') + ', ' + data.get('gradientEnd', '#764ba2') + ')' if data.get('backgroundType') == 'gradient' else data.get('background', '#f5f5f5')
+    text_color = data.get('textColor', '#1a1a1a')
+    button_color = data.get('buttonColor', '#0066cc')
+    button_text_color = data.get('buttonTextColor', '#ffffff')
+
+    return f"""
     <section style="min-height: {data.get('minHeight', '400px')}; display: flex; align-items: center; justify-content: center; text-align: {data.get('textAlign', 'center')}; padding: 4rem 2rem; background: {bg}; color: {text_color};">
         <div style="max-width: 800px;">
             <h1 style="font-size: 3rem; margin-bottom: 1rem;">{data.get('title', 'Welcome')}</h1>
@@ -509,9 +1669,10 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'text':
-        return f"""
+
+@register_component('text')
+def render_text(data):
+    return f"""
     <section class="section">
         <div class="container">
             <h2>{data.get('heading', 'Heading')}</h2>
@@ -519,28 +1680,30 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'image':
-        return f"""
+
+@register_component('image')
+def render_image(data):
+    return f"""
     <section class="section">
         <div class="container">
-            <img src="{data.get('src', 'https://via.placeholder.com/800x400')}" alt="{data.get('alt', 'Image')}">
+            <img src="{data.get('src', 'https://via.placeholder.com/800x400')}" alt="{data.get('alt', 'Image')}"{responsive_image_attrs(data.get('src'), '(max-width: 1200px) 100vw, 1136px')}>
         </div>
     </section>
 """
-    
-    elif comp_type == 'features':
-        features_html = ''
-        for feature in data.get('features', []):
-            features_html += f"""
+
+@register_component('features')
+def render_features(data):
+    features_html = ''
+    for feature in data.get('features', []):
+        features_html += f"""
                 <div style="background: white; padding: 2rem; border-radius: 1rem; text-align: center; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
                     <div style="font-size: 3rem; margin-bottom: 1rem;">{feature.get('icon', '⭐')}</div>
                     <h3 style="font-size: 1.25rem; margin-bottom: 0.5rem;">{feature.get('title', 'Feature')}</h3>
                     <p style="opacity: 0.7;">{feature.get('description', 'Description')}</p>
                 </div>
             """
-        
-        return f"""
+
+    return f"""
     <section class="section" style="background: #f8fafc;">
         <div class="container">
             <h2 style="text-align: center; margin-bottom: 3rem;">{data.get('heading', 'Our Features')}</h2>
@@ -550,9 +1713,10 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'cta':
-        return f"""
+
+@register_component('cta')
+def render_cta(data):
+    return f"""
     <section class="section" style="background: linear-gradient(135deg, #0066cc, #00a8ff); color: white; text-align: center; padding: 6rem 2rem;">
         <div class="container">
             <h2 style="font-size: 2.5rem; margin-bottom: 1rem;">{data.get('heading', 'Ready to Get Started?')}</h2>
@@ -561,13 +1725,14 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'gallery':
-        images_html = ''
-        for img_url in data.get('images', []):
-            images_html += f'<img src="{img_url}" style="width: 100%; height: 250px; object-fit: cover; border-radius: 0.5rem;">'
-        
-        return f"""
+
+@register_component('gallery')
+def render_gallery(data):
+    images_html = ''
+    for img_url in data.get('images', []):
+        images_html += f'<img src="{img_url}"{responsive_image_attrs(img_url, "(max-width: 640px) 100vw, 400px")} style="width: 100%; height: 250px; object-fit: cover; border-radius: 0.5rem;">'
+
+    return f"""
     <section class="section">
         <div class="container">
             <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem;">
@@ -576,12 +1741,13 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'testimonials':
-        testimonials_html = ''
-        for testimonial in data.get('testimonials', []):
-            stars = '⭐' * testimonial.get('rating', 5)
-            testimonials_html += f"""
+
+@register_component('testimonials')
+def render_testimonials(data):
+    testimonials_html = ''
+    for testimonial in data.get('testimonials', []):
+        stars = '⭐' * testimonial.get('rating', 5)
+        testimonials_html += f"""
                 <div style="background: white; padding: 2rem; border-radius: 1rem; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
                     <div style="margin-bottom: 1rem;">{stars}</div>
                     <p style="font-style: italic; margin-bottom: 1rem;">"{testimonial.get('text', 'Great service!')}"</p>
@@ -589,8 +1755,8 @@ def render_component(component):
                     <p style="font-size: 0.875rem; opacity: 0.7;">{testimonial.get('role', 'User')}</p>
                 </div>
             """
-        
-        return f"""
+
+    return f"""
     <section class="section" style="background: #f8fafc;">
         <div class="container">
             <h2 style="text-align: center; margin-bottom: 3rem;">{data.get('heading', 'What Our Customers Say')}</h2>
@@ -601,19 +1767,20 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'team':
-        members_html = ''
-        for member in data.get('members', []):
-            members_html += f"""
+@register_component('team')
+def render_team(data):
+    members_html = ''
+    for member in data.get('members', []):
+        members_html += f"""
                 <div style="background: white; padding: 2rem; border-radius: 1rem; text-align: center; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
-                    <img src="{member.get('image', '')}" style="width: 120px; height: 120px; border-radius: 50%; object-fit: cover; margin-bottom: 1rem;">
+                    <img src="{member.get('image', '')}"{responsive_image_attrs(member.get('image'), '120px')} style="width: 120px; height: 120px; border-radius: 50%; object-fit: cover; margin-bottom: 1rem;">
                     <h3 style="font-size: 1.25rem; margin-bottom: 0.25rem;">{member.get('name', 'Name')}</h3>
                     <p style="color: #0066cc; font-weight: 600; margin-bottom: 0.75rem;">{member.get('role', 'Role')}</p>
                     <p style="opacity: 0.7; font-size: 0.875rem;">{member.get('bio', 'Bio')}</p>
                 </div>
             """
-        
-        return f"""
+
+    return f"""
     <section class="section" style="background: #f8fafc;">
         <div class="container">
             <h2 style="text-align: center; margin-bottom: 3rem;">{data.get('heading', 'Meet Our Team')}</h2>
@@ -623,18 +1790,19 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'stats':
-        stats_html = ''
-        for stat in data.get('stats', []):
-            stats_html += f"""
+
+@register_component('stats')
+def render_stats(data):
+    stats_html = ''
+    for stat in data.get('stats', []):
+        stats_html += f"""
                 <div>
                     <div style="font-size: 3rem; font-weight: 800; color: #0066cc; margin-bottom: 0.5rem;">{stat.get('number', '0')}</div>
                     <div style="font-size: 1rem; color: #64748b;">{stat.get('label', 'Label')}</div>
                 </div>
             """
-        
-        return f"""
+
+    return f"""
     <section class="section" style="background: {data.get('backgroundColor', '#f8fafc')};">
         <div class="container">
             <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 3rem; text-align: center; max-width: 1000px; margin: 0 auto;">
@@ -643,18 +1811,19 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'faq':
-        faqs_html = ''
-        for faq in data.get('faqs', []):
-            faqs_html += f"""
+
+@register_component('faq')
+def render_faq(data):
+    faqs_html = ''
+    for faq in data.get('faqs', []):
+        faqs_html += f"""
                 <div style="background: #f8fafc; padding: 1.5rem; border-radius: 0.75rem; margin-bottom: 1rem;">
                     <h3 style="font-size: 1.125rem; margin-bottom: 0.75rem; color: #0f172a;">{faq.get('question', 'Question?')}</h3>
                     <p style="color: #64748b; line-height: 1.6;">{faq.get('answer', 'Answer')}</p>
                 </div>
             """
-        
-        return f"""
+
+    return f"""
     <section class="section">
         <div class="container">
             <h2 style="text-align: center; margin-bottom: 3rem; max-width: 800px; margin-left: auto; margin-right: auto;">{data.get('heading', 'FAQ')}</h2>
@@ -664,9 +1833,10 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'contact':
-        return f"""
+
+@register_component('contact')
+def render_contact(data):
+    return f"""
     <section class="section" style="background: {data.get('backgroundColor', '#ffffff')};">
         <div class="container">
             <h2 style="font-size: 2rem; text-align: center; margin-bottom: 1rem; max-width: 600px; margin-left: auto; margin-right: auto;">{data.get('heading', 'Get In Touch')}</h2>
@@ -680,11 +1850,12 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'newsletter':
-        bg = 'linear-gradient(135deg, ' + data.get('gradientStart', '#667eea') + ', ' + data.get('gradientEnd', '#764ba2') + ')' if data.get('backgroundType') == 'gradient' else data.get('backgroundColor', '#0066cc')
-        
-        return f"""
+
+@register_component('newsletter')
+def render_newsletter(data):
+    bg = 'linear-gradient(135deg, ' + data.get('gradientStart', '#667eea') + ', ' + data.get('gradientEnd', '#764ba2') + ')' if data.get('backgroundType') == 'gradient' else data.get('backgroundColor', '#0066cc')
+
+    return f"""
     <section class="section" style="background: {bg}; color: white;">
         <div class="container">
             <div style="max-width: 600px; margin: 0 auto; text-align: center;">
@@ -698,13 +1869,14 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'logos':
-        logos_html = ''
-        for logo in data.get('logos', []):
-            logos_html += f'<img src="{logo}" style="width: 100%; height: auto; filter: grayscale(100%);">'
-        
-        return f"""
+
+@register_component('logos')
+def render_logos(data):
+    logos_html = ''
+    for logo in data.get('logos', []):
+        logos_html += f'<img src="{logo}"{responsive_image_attrs(logo, "200px")} style="width: 100%; height: auto; filter: grayscale(100%);">'
+
+    return f"""
     <section class="section" style="background: #f8fafc;">
         <div class="container">
             <h2 style="font-size: 1.5rem; text-align: center; margin-bottom: 3rem; color: #64748b; text-transform: uppercase; letter-spacing: 0.1em; font-weight: 600;">{data.get('heading', 'Trusted By')}</h2>
@@ -714,11 +1886,12 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'timeline':
-        events_html = ''
-        for event in data.get('events', []):
-            events_html += f"""
+
+@register_component('timeline')
+def render_timeline(data):
+    events_html = ''
+    for event in data.get('events', []):
+        events_html += f"""
                 <div style="display: flex; gap: 2rem; margin-bottom: 2rem; position: relative; padding-left: 3rem;">
                     <div style="position: absolute; left: 0; top: 0; width: 3rem; height: 3rem; background: #0066cc; color: white; border-radius: 50%; display: flex; align-items: center; justify-content: center; font-weight: 700; font-size: 0.875rem;">{event.get('year', '2025')}</div>
                     <div style="flex: 1; background: #f8fafc; padding: 1.5rem; border-radius: 0.75rem;">
@@ -727,8 +1900,8 @@ def render_component(component):
                     </div>
                 </div>
             """
-        
-        return f"""
+
+    return f"""
     <section class="section">
         <div class="container">
             <h2 style="text-align: center; margin-bottom: 3rem; max-width: 800px; margin-left: auto; margin-right: auto;">{data.get('heading', 'Our Journey')}</h2>
@@ -738,9 +1911,10 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'video':
-        return f"""
+
+@register_component('video')
+def render_video(data):
+    return f"""
     <section class="section">
         <div class="container">
             <h2 style="font-size: 2rem; text-align: center; margin-bottom: 2rem; max-width: {data.get('maxWidth', '800px')}; margin-left: auto; margin-right: auto;">{data.get('title', 'Watch Our Video')}</h2>
@@ -752,12 +1926,13 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    elif comp_type == 'footer':
-        columns_html = ''
-        for col in data.get('columns', []):
-            links_html = ''.join([f'<li style="margin-bottom: 0.5rem;"><a href="#" style="color: #94a3b8; text-decoration: none;">{link}</a></li>' for link in col.get('links', [])])
-            columns_html += f"""
+
+@register_component('footer')
+def render_footer(data):
+    columns_html = ''
+    for col in data.get('columns', []):
+        links_html = ''.join([f'<li style="margin-bottom: 0.5rem;"><a href="#" style="color: #94a3b8; text-decoration: none;">{link}</a></li>' for link in col.get('links', [])])
+        columns_html += f"""
                 <div>
                     <h4 style="font-size: 1rem; margin-bottom: 1rem; font-weight: 600;">{col.get('title', 'Title')}</h4>
                     <ul style="list-style: none; padding: 0;">
@@ -765,8 +1940,8 @@ def render_component(component):
                     </ul>
                 </div>
             """
-        
-        return f"""
+
+    return f"""
     <footer style="padding: 4rem 2rem 2rem; background: #0f172a; color: white;">
         <div class="container">
             <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 2rem; margin-bottom: 3rem; max-width: 1000px; margin-left: auto; margin-right: auto;">
@@ -782,12 +1957,13 @@ def render_component(component):
         </div>
     </footer>
 """
-    
-    elif comp_type == 'navbar':
-        links_html = ''.join([f'<a href="#" style="color: #64748b; text-decoration: none; font-weight: 500;">{link}</a>' for link in data.get('links', [])])
-        sticky = 'position: sticky; top: 0; z-index: 100;' if data.get('sticky', True) else ''
-        
-        return f"""
+
+@register_component('navbar')
+def render_navbar(data):
+    links_html = ''.join([f'<a href="#" style="color: #64748b; text-decoration: none; font-weight: 500;">{link}</a>' for link in data.get('links', [])])
+    sticky = 'position: sticky; top: 0; z-index: 100;' if data.get('sticky', True) else ''
+
+    return f"""
     <nav style="background: {data.get('backgroundColor', '#ffffff')}; padding: 1rem 2rem; border-bottom: 1px solid #e2e8f0; {sticky}">
         <div class="container">
             <div style="display: flex; justify-content: space-between; align-items: center; max-width: 1200px; margin: 0 auto;">
@@ -800,13 +1976,14 @@ def render_component(component):
         </div>
     </nav>
 """
-    
-    elif comp_type == 'pricing':
-        plans_html = ''
-        for plan in data.get('plans', []):
-            features_list = ''.join([f'<li style="padding: 0.5rem 0;">✓ {feature}</li>' for feature in plan.get('features', [])])
-            
-            plans_html += f"""
+
+@register_component('pricing')
+def render_pricing(data):
+    plans_html = ''
+    for plan in data.get('plans', []):
+        features_list = ''.join([f'<li style="padding: 0.5rem 0;">✓ {feature}</li>' for feature in plan.get('features', [])])
+
+        plans_html += f"""
                 <div style="background: white; padding: 2rem; border-radius: 1rem; box-shadow: 0 4px 6px rgba(0,0,0,0.1); text-align: center;">
                     <h3 style="font-size: 1.5rem; margin-bottom: 1rem;">{plan.get('name', 'Plan')}</h3>
                     <div style="font-size: 2.5rem; font-weight: 800; margin-bottom: 1rem;">${plan.get('price', '0')}<span style="font-size: 1rem; font-weight: normal;">/mo</span></div>
@@ -816,8 +1993,8 @@ def render_component(component):
                     <a href="{plan.get('buttonUrl', '#')}" style="display: block; padding: 0.75rem; background: #0066cc; color: white; text-decoration: none; border-radius: 0.5rem; font-weight: 600;">{plan.get('buttonText', 'Choose Plan')}</a>
                 </div>
             """
-        
-        return f"""
+
+    return f"""
     <section class="section">
         <div class="container">
             <h2 style="text-align: center; margin-bottom: 3rem;">{data.get('heading', 'Choose Your Plan')}</h2>
@@ -828,8 +2005,9 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'accordion':
-        items_html = ''.join([f"""
+@register_component('accordion')
+def render_accordion(data):
+    items_html = ''.join([f"""
             <div style="background: white; border: 1px solid #e2e8f0; border-radius: 0.5rem; margin-bottom: 1rem; overflow: hidden;">
                 <div style="padding: 1.25rem; font-weight: 600; cursor: pointer; display: flex; justify-content: space-between; align-items: center;">
                     <span>{item['title']}</span>
@@ -838,8 +2016,8 @@ def render_component(component):
                 <div style="padding: 0 1.25rem 1.25rem; color: #64748b; line-height: 1.6;">{item['content']}</div>
             </div>
         """ for item in data.get('items', [])])
-        
-        return f"""
+
+    return f"""
     <section class="section">
         <div class="container" style="max-width: 800px;">
             <h2 style="font-size: 2rem; text-align: center; margin-bottom: 3rem;">{data.get('heading', 'FAQ')}</h2>
@@ -848,12 +2026,13 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'tabs':
-        tabs_html = ''.join([f"""
+@register_component('tabs')
+def render_tabs(data):
+    tabs_html = ''.join([f"""
             <button style="padding: 1rem 0; border: none; background: none; font-weight: 600; color: {'#0066cc' if i == 0 else '#64748b'}; border-bottom: 3px solid {'#0066cc' if i == 0 else 'transparent'}; cursor: pointer;">{tab['title']}</button>
         """ for i, tab in enumerate(data.get('tabs', []))])
-        
-        return f"""
+
+    return f"""
     <section class="section">
         <div class="container" style="max-width: 800px;">
             <div style="border-bottom: 2px solid #e2e8f0; margin-bottom: 2rem; display: flex; gap: 2rem;">
@@ -866,16 +2045,17 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'cards':
-        cards_html = ''.join([f"""
+@register_component('cards')
+def render_cards(data):
+    cards_html = ''.join([f"""
             <div style="background: white; padding: 2.5rem; border-radius: 1rem; text-align: center; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
                 <div style="font-size: 3.5rem; margin-bottom: 1rem;">{card['icon']}</div>
                 <h3 style="font-size: 1.5rem; margin-bottom: 1rem; font-weight: 700;">{card['title']}</h3>
                 <p style="color: #64748b; line-height: 1.6;">{card['description']}</p>
             </div>
         """ for card in data.get('cards', [])])
-        
-        return f"""
+
+    return f"""
     <section class="section" style="background: #f8fafc;">
         <div class="container">
             <h2 style="font-size: 2rem; text-align: center; margin-bottom: 3rem;">{data.get('heading', 'Our Services')}</h2>
@@ -886,9 +2066,10 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'countdown':
-        countdown_id = f"countdown-{hash(str(data))}"
-        return f"""
+@register_component('countdown')
+def render_countdown(data):
+    countdown_id = f"countdown-{hashlib.sha1(str(data).encode('utf-8')).hexdigest()[:12]}"
+    return f"""
     <section style="padding: 6rem 2rem; background: {data.get('backgroundColor', '#667eea')}; color: {data.get('textColor', '#ffffff')}; text-align: center;">
         <div style="max-width: 800px; margin: 0 auto;">
             <h2 style="font-size: 2.5rem; margin-bottom: 0.5rem; font-weight: 800;">{data.get('heading', 'Coming Soon')}</h2>
@@ -947,8 +2128,9 @@ def render_component(component):
     </script>
 """
 
-    elif comp_type == 'quote':
-        return f"""
+@register_component('quote')
+def render_quote(data):
+    return f"""
     <section class="section" style="background: {data.get('backgroundColor', '#f8fafc')};">
         <div class="container" style="max-width: 800px; text-align: center;">
             <div style="font-size: 4rem; color: #0066cc; margin-bottom: 1rem;">"</div>
@@ -958,16 +2140,17 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'steps':
-        steps_html = ''.join([f"""
+@register_component('steps')
+def render_steps(data):
+    steps_html = ''.join([f"""
             <div style="text-align: center; position: relative;">
                 <div style="width: 80px; height: 80px; border-radius: 50%; background: linear-gradient(135deg, #667eea, #764ba2); color: white; display: flex; align-items: center; justify-content: center; font-size: 2rem; font-weight: 800; margin: 0 auto 1.5rem;">{step['number']}</div>
                 <h3 style="font-size: 1.25rem; margin-bottom: 0.75rem; font-weight: 700;">{step['title']}</h3>
                 <p style="color: #64748b; line-height: 1.6;">{step['description']}</p>
             </div>
         """ for step in data.get('steps', [])])
-        
-        return f"""
+
+    return f"""
     <section class="section">
         <div class="container">
             <h2 style="font-size: 2rem; text-align: center; margin-bottom: 4rem;">{data.get('heading', 'How It Works')}</h2>
@@ -978,11 +2161,12 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'banner':
-        button_html = f'<a href="{data.get("buttonUrl", "#")}" style="padding: 0.5rem 1.5rem; background: white; color: {data.get("backgroundColor", "#0066cc")}; text-decoration: none; border-radius: 0.5rem; font-weight: 600;">{data.get("buttonText", "Learn More")}</a>' if data.get('buttonText') else ''
-        dismiss_html = '<button style="background: none; border: none; color: white; cursor: pointer; font-size: 1.5rem; margin-left: auto;">×</button>' if data.get('dismissible') else ''
-        
-        return f"""
+@register_component('banner')
+def render_banner(data):
+    button_html = f'<a href="{data.get("buttonUrl", "#")}" style="padding: 0.5rem 1.5rem; background: white; color: {data.get("backgroundColor", "#0066cc")}; text-decoration: none; border-radius: 0.5rem; font-weight: 600;">{data.get("buttonText", "Learn More")}</a>' if data.get('buttonText') else ''
+    dismiss_html = '<button style="background: none; border: none; color: white; cursor: pointer; font-size: 1.5rem; margin-left: auto;">×</button>' if data.get('dismissible') else ''
+
+    return f"""
     <div style="padding: 1rem 2rem; background: {data.get('backgroundColor', '#0066cc')}; color: {data.get('textColor', '#ffffff')}; text-align: center; display: flex; align-items: center; justify-content: center; gap: 2rem; flex-wrap: wrap;">
         <p style="font-weight: 600; margin: 0;">{data.get('text', 'Announcement text')}</p>
         {button_html}
@@ -990,16 +2174,17 @@ def render_component(component):
     </div>
 """
 
-    elif comp_type == 'metrics':
-        metrics_html = ''.join([f"""
+@register_component('metrics')
+def render_metrics(data):
+    metrics_html = ''.join([f"""
             <div style="text-align: center;">
                 <div style="font-size: 3rem; margin-bottom: 0.5rem;">{metric['icon']}</div>
                 <div style="font-size: 3rem; font-weight: 800; color: #0066cc; margin-bottom: 0.5rem;">{metric['number']}</div>
                 <div style="color: #64748b; font-weight: 500;">{metric['label']}</div>
             </div>
         """ for metric in data.get('metrics', [])])
-        
-        return f"""
+
+    return f"""
     <section class="section" style="background: {data.get('backgroundColor', '#ffffff')};">
         <div class="container">
             <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 3rem; text-align: center;">
@@ -1009,18 +2194,19 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'portfolio':
-        projects_html = ''.join([f"""
+@register_component('portfolio')
+def render_portfolio(data):
+    projects_html = ''.join([f"""
             <div style="position: relative; overflow: hidden; border-radius: 1rem; cursor: pointer; aspect-ratio: 4/3;">
-                <img src="{project['image']}" style="width: 100%; height: 100%; object-fit: cover;">
+                <img src="{project['image']}"{responsive_image_attrs(project['image'], '(max-width: 700px) 100vw, 560px')} style="width: 100%; height: 100%; object-fit: cover;">
                 <div style="position: absolute; bottom: 0; left: 0; right: 0; background: linear-gradient(to top, rgba(0,0,0,0.8), transparent); padding: 2rem 1.5rem 1.5rem; color: white;">
                     <div style="font-size: 0.75rem; text-transform: uppercase; letter-spacing: 0.1em; opacity: 0.8; margin-bottom: 0.25rem;">{project['category']}</div>
                     <h3 style="font-size: 1.25rem; font-weight: 700;">{project['title']}</h3>
                 </div>
             </div>
         """ for project in data.get('projects', [])])
-        
-        return f"""
+
+    return f"""
     <section class="section" style="background: #f8fafc;">
         <div class="container">
             <h2 style="font-size: 2rem; text-align: center; margin-bottom: 3rem;">{data.get('heading', 'Our Work')}</h2>
@@ -1031,14 +2217,15 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'columns':
-        columns_html = ''.join([f"""
+@register_component('columns')
+def render_columns(data):
+    columns_html = ''.join([f"""
             <div style="padding: 2rem; background: #f8fafc; border-radius: 0.5rem;">
                 <p style="line-height: 1.7; color: #334155;">{col['content']}</p>
             </div>
         """ for col in data.get('columns', [])])
-        
-        return f"""
+
+    return f"""
     <section class="section" style="background: {data.get('backgroundColor', '#ffffff')};">
         <div class="container">
             <div style="display: grid; grid-template-columns: repeat({data.get('columnCount', 2)}, 1fr); gap: 2rem;">
@@ -1048,8 +2235,9 @@ def render_component(component):
     </section>
 """
 
-    elif comp_type == 'separator':
-        return f"""
+@register_component('separator')
+def render_separator(data):
+    return f"""
     <div style="padding: {data.get('spacing', '3rem')} 2rem;">
         <div class="container">
             <hr style="border: none; border-top: {data.get('thickness', '2px')} {data.get('style', 'solid')} {data.get('color', '#e2e8f0')}; width: {data.get('width', '50%')}; margin: 0 auto;">
@@ -1057,30 +2245,31 @@ def render_component(component):
     </div>
 """
 
-    elif comp_type == 'graph':
-        labels = data.get('labels', [])
-        datasets = data.get('datasets', [])
-        
-        if datasets:
-            max_value = max([max(ds.get('data', [1])) for ds in datasets]) if datasets else 100
-            bars_html = ''.join([f"""
+@register_component('graph')
+def render_graph(data):
+    labels = data.get('labels', [])
+    datasets = data.get('datasets', [])
+
+    if datasets:
+        max_value = max([max(ds.get('data', [1])) for ds in datasets]) if datasets else 100
+        bars_html = ''.join([f"""
                 <div style="flex: 1; display: flex; flex-direction: column; align-items: center; gap: 0.5rem;">
                     <div style="width: 100%; height: {(datasets[0]['data'][i] / max_value * 100) if i < len(datasets[0]['data']) else 0}%; background: {datasets[0].get('color', '#0066cc')}; border-radius: 0.5rem 0.5rem 0 0; min-height: 20px;"></div>
                     <div style="font-size: 0.875rem; font-weight: 600;">{label}</div>
                 </div>
             """ for i, label in enumerate(labels)])
-            
-            legend_html = ''.join([f"""
+
+        legend_html = ''.join([f"""
                 <div style="display: flex; align-items: center; gap: 0.5rem;">
                     <div style="width: 20px; height: 20px; background: {ds.get('color', '#0066cc')}; border-radius: 0.25rem;"></div>
                     <span style="font-size: 0.875rem;">{ds.get('label', '')}</span>
                 </div>
             """ for ds in datasets]) if data.get('showLegend') else ''
-        else:
-            bars_html = ''
-            legend_html = ''
-        
-        return f"""
+    else:
+        bars_html = ''
+        legend_html = ''
+
+    return f"""
     <section class="section" style="background: #f8fafc;">
         <div class="container" style="max-width: 800px;">
             <h2 style="font-size: 2rem; text-align: center; margin-bottom: 3rem;">{data.get('heading', 'Chart')}</h2>
@@ -1093,12 +2282,98 @@ def render_component(component):
         </div>
     </section>
 """
-    
-    return ''
 
-def generate_css(components, settings):
-    """Generate separate CSS file"""
-    return generate_inline_css(components, settings)
+
+def generate_css(components, settings, extractor=None):
+    """Generate separate CSS file, including any styles hoisted out of the HTML"""
+    css = generate_inline_css(components, settings)
+    if extractor:
+        css += '\n' + extractor.css()
+    return css
+
+# Minification
+MINIFY_PRESERVE_RE = re.compile(r'<(pre|textarea)\b.*?</\1>', re.S | re.I)
+
+def collapse_lines(text):
+    return '\n'.join(line.strip() for line in text.splitlines() if line.strip())
+
+def minify_html(html):
+    """Strip indentation and blank lines, leaving <pre> and <textarea> contents untouched"""
+    parts = []
+    pos = 0
+    for match in MINIFY_PRESERVE_RE.finditer(html):
+        parts.append(collapse_lines(html[pos:match.start()]))
+        parts.append(match.group(0))
+        pos = match.end()
+    parts.append(collapse_lines(html[pos:]))
+    return ''.join(parts)
+
+def minify_css(css):
+    """Remove comments and all whitespace CSS does not need"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+def minify_js(js):
+    """Strip indentation, blank lines and whole-line comments"""
+    return '\n'.join(line for line in collapse_lines(js).split('\n') if not line.startswith('//'))
+
+# Identifies the rendering code, so cached renders and ETags change on deploy
+with open(__file__, 'rb') as f:
+    RENDER_FINGERPRINT = hashlib.sha256(f.read()).hexdigest()
+
+def render_etag(components, settings, minify=False):
+    """Strong ETag for a rendered page, computed from its inputs without rendering"""
+    digest = hashlib.sha256(RENDER_FINGERPRINT.encode('utf-8'))
+    digest.update(json.dumps([settings, minify], sort_keys=True, default=str).encode('utf-8'))
+    for component in components:
+        digest.update(FragmentCache.key(component).encode('utf-8'))
+    return digest.hexdigest()
+
+class StyleExtractor:
+    """Hoists inline style attributes into shared classes named after a hash of their declarations.
+
+    Rules are emitted after the base stylesheet so they still win over it,
+    the same way the inline styles did.
+    """
+    TAG_RE = re.compile(r'<[a-zA-Z][^<>]*?\sstyle="[^"]*"[^<>]*>')
+    STYLE_RE = re.compile(r'\sstyle="([^"]*)"')
+    CLASS_RE = re.compile(r'\sclass="([^"]*)"')
+    TAG_NAME_RE = re.compile(r'^<[a-zA-Z][\w-]*')
+
+    def __init__(self):
+        self.classes = {}  # declarations -> class name, in first-seen order
+
+    def class_for(self, declarations):
+        declarations = ' '.join(declarations.split()).strip().rstrip(';').strip()
+        if not declarations:
+            return None
+        name = self.classes.get(declarations)
+        if name is None:
+            name = 's-' + hashlib.sha1(declarations.encode('utf-8')).hexdigest()[:10]
+            self.classes[declarations] = name
+        return name
+
+    def _replace(self, match):
+        tag = match.group(0)
+        style = self.STYLE_RE.search(tag)
+        name = self.class_for(style.group(1))
+        tag = tag[:style.start()] + tag[style.end():]
+        if name is None:
+            return tag
+        
+        existing = self.CLASS_RE.search(tag)
+        if existing:
+            return tag[:existing.start()] + f' class="{existing.group(1)} {name}"' + tag[existing.end():]
+        return self.TAG_NAME_RE.sub(lambda m: f'{m.group(0)} class="{name}"', tag, count=1)
+
+    def process(self, html):
+        return self.TAG_RE.sub(self._replace, html)
+
+    def css(self):
+        return '\n'.join(f'.{name} {{ {declarations}; }}' for declarations, name in self.classes.items())
 
 def generate_js(components, settings):
     """Generate JavaScript file"""
@@ -1107,6 +2382,172 @@ def generate_js(components, settings):
 console.log('Website loaded successfully!');
 """
 
+def generate_readme(project):
+    """Generate README for the ZIP package"""
+    return f"""# {project.name}
+
+Created with Website Builder
+
+## Files
+- index.html - Main HTML file
+- styles.css - Stylesheet
+- script.js - JavaScript functionality
+
+## Usage
+Open index.html in your browser or deploy to any web hosting service.
+"""
+
+def zip_entries(project, components, settings, minify=False, fragments=None):
+    """Files for the ZIP package, as (name, chunks) pairs for iter_zip.
+
+    The uploads the page references follow the text files under assets/;
+    they are only known once the page and stylesheet have been written.
+    """
+    assets = ExportAssets()
+    yield from package_files(project, components, settings, minify, fragments, assets)
+    yield from assets.entries()
+
+def package_files(project, components, settings, minify=False, fragments=None, assets=None):
+    """The text files of the ZIP package, as (name, chunks) pairs.
+
+    index.html links styles.css and has its inline styles hoisted into it;
+    the stylesheet is only rendered once the page has been written. With
+    assets, upload URLs are rewritten to their bundled copies.
+    """
+    extractor = StyleExtractor()
+    rewrite = assets.rewrite if assets is not None else (lambda text: text)
+    
+    def page():
+        for chunk in iter_html(components, settings, stylesheet='styles.css', minify=minify, fragments=fragments):
+            yield rewrite(extractor.process(chunk))
+    
+    def stylesheet():
+        css = generate_css(components, settings, extractor)
+        yield rewrite(minify_css(css) if minify else css)
+    
+    js = generate_js(components, settings)
+    return [
+        ('index.html', page()),
+        ('styles.css', stylesheet()),
+        ('script.js', [rewrite(minify_js(js) if minify else js)]),
+        ('README.md', [generate_readme(project)])
+    ]
+
+# Formats that are already compressed; deflating them again only costs CPU
+STORED_ASSET_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
+UPLOAD_REFERENCE = re.compile(
+    r'(?:https?://[^/\s"\'()<>]+)?/static/uploads/([\w-]+(?:/[\w-]+)*\.(?:png|jpe?g|gif|webp|svg))(?![\w.])'
+)
+SRCSET_ATTRIBUTE = re.compile(r'(\ssrcset=")([^"]*)(")')
+
+class ExportAssets:
+    """Uploads referenced by an exported page, bundled under assets/ with their URLs rewritten.
+
+    files maps each upload path (relative to UPLOAD_FOLDER) to its name in
+    the archive; each file is included once however often it is referenced.
+    """
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+
+    def rewrite(self, text):
+        return UPLOAD_REFERENCE.sub(self._replace, SRCSET_ATTRIBUTE.sub(self._prune_srcset, text))
+
+    def _prune_srcset(self, match):
+        """Drop srcset candidates whose upload is missing, so the archive has no dangling references"""
+        candidates = [candidate.strip() for candidate in match.group(2).split(',') if self._available(candidate)]
+        if not candidates:
+            return ''
+        return match.group(1) + ', '.join(candidates) + match.group(3)
+
+    def _available(self, candidate):
+        reference = UPLOAD_REFERENCE.search(candidate)
+        return reference is None or os.path.isfile(os.path.join(app.config['UPLOAD_FOLDER'], reference.group(1)))
+
+    def _replace(self, match):
+        upload = match.group(1)
+        if upload not in self.files:
+            if not os.path.isfile(os.path.join(app.config['UPLOAD_FOLDER'], upload)):
+                return match.group(0)  # leave URLs to missing files alone rather than break them
+            self.files[upload] = f'assets/{os.path.basename(upload)}'
+        return self.files[upload]
+
+    def entries(self, prefix=''):
+        """(ZipInfo, chunks) pairs that stream each file from disk"""
+        for upload, name in self.files.items():
+            info = zipfile.ZipInfo(prefix + name, date_time=time.localtime()[:6])
+            extension = upload.rsplit('.', 1)[1].lower()
+            info.compress_type = zipfile.ZIP_STORED if extension in STORED_ASSET_EXTENSIONS else zipfile.ZIP_DEFLATED
+            yield info, iter_file(os.path.join(app.config['UPLOAD_FOLDER'], upload))
+
+def iter_file(path, chunk_size=UPLOAD_CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(chunk_size), b'')
+
+class ZipStreamBuffer:
+    """Write-only, non-seekable file object that collects ZIP output until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_zip(entries):
+    """Yield a ZIP archive as it is written.
+
+    entries is an iterable of (name, chunks) pairs where chunks yields str or
+    bytes. name may also be a ZipInfo to control the compression per file.
+    Because the output is not seekable, zipfile writes sizes and CRCs in data
+    descriptors, so only the current chunk is ever held in memory.
+    """
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, chunks in entries:
+            if isinstance(name, zipfile.ZipInfo):
+                info = name
+            else:
+                info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(info, 'w') as dest:
+                for chunk in chunks:
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode('utf-8')
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    yield buffer.drain()
+
+def content_disposition(filename):
+    """Build an attachment Content-Disposition header value, as send_file does"""
+    try:
+        filename.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        return dump_options_header('attachment', {
+            'filename': simple,
+            'filename*': f"UTF-8''{quote(filename, safe='!#$&+^`|~')}"
+        })
+    return dump_options_header('attachment', {'filename': filename})
+
 def generate_react(components, settings):
     """Generate React component code"""
     return f"""import React from 'react';
@@ -1142,9 +2583,821 @@ export default {{
 </script>
 """
 
+# JSON Patch (RFC 6902)
+class JsonPatchError(ValueError):
+    pass
+
+def parse_pointer(pointer):
+    if pointer == '':
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith('/'):
+        raise JsonPatchError(f'invalid path {pointer!r}')
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+def list_index(container, token, allow_end=False):
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith('0')):
+        raise JsonPatchError(f'invalid array index {token!r}')
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError(f'array index {index} out of range')
+    return index
+
+def pointer_get(document, tokens):
+    value = document
+    for token in tokens:
+        if isinstance(value, list):
+            value = value[list_index(value, token)]
+        elif isinstance(value, dict) and token in value:
+            value = value[token]
+        else:
+            raise JsonPatchError(f'path /{"/".join(tokens)} does not exist')
+    return value
+
+def pointer_add(document, tokens, value):
+    parent = pointer_get(document, tokens[:-1])
+    if isinstance(parent, list):
+        parent.insert(list_index(parent, tokens[-1], allow_end=True), value)
+    elif isinstance(parent, dict):
+        parent[tokens[-1]] = value
+    else:
+        raise JsonPatchError(f'cannot add to /{"/".join(tokens[:-1])}')
+
+def pointer_remove(document, tokens):
+    parent = pointer_get(document, tokens[:-1])
+    if isinstance(parent, list):
+        return parent.pop(list_index(parent, tokens[-1]))
+    if isinstance(parent, dict) and tokens[-1] in parent:
+        return parent.pop(tokens[-1])
+    raise JsonPatchError(f'path /{"/".join(tokens)} does not exist')
+
+def apply_json_patch(document, operations):
+    """Apply RFC 6902 operations to document in place; operations on the root itself are rejected"""
+    if not isinstance(operations, list):
+        raise JsonPatchError('patch must be a list of operations')
+    
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise JsonPatchError('each operation must be an object')
+        op = operation.get('op')
+        path = parse_pointer(operation.get('path'))
+        if not path:
+            raise JsonPatchError('operations on the whole document are not supported')
+        
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise JsonPatchError(f'{op} requires a value')
+        
+        if op == 'add':
+            pointer_add(document, path, operation['value'])
+        elif op == 'remove':
+            pointer_remove(document, path)
+        elif op == 'replace':
+            pointer_remove(document, path)
+            pointer_add(document, path, operation['value'])
+        elif op == 'move':
+            source = parse_pointer(operation.get('from'))
+            if not source or path[:len(source)] == source and path != source:
+                raise JsonPatchError('cannot move a value into itself')
+            pointer_add(document, path, pointer_remove(document, source))
+        elif op == 'copy':
+            value = copy.deepcopy(pointer_get(document, parse_pointer(operation.get('from'))))
+            pointer_add(document, path, value)
+        elif op == 'test':
+            if pointer_get(document, path) != operation['value']:
+                raise JsonPatchError(f'test failed at {operation["path"]}')
+        else:
+            raise JsonPatchError(f'unknown operation {op!r}')
+
+# Incremental Rendering
+def component_ids(components):
+    """Map each component id to its first occurrence; components without an id are skipped"""
+    by_id = {}
+    for component in components:
+        if component.get('id') is not None:
+            by_id.setdefault(str(component['id']), component)
+    return by_id
+
+def prune_rendered_components(project, old_components, new_components):
+    """Drop stored renders of removed components; changed ones are caught by their content_key"""
+    new_by_id = component_ids(new_components)
+    removed = [cid for cid in component_ids(old_components) if cid not in new_by_id]
+    if removed:
+        RenderedComponent.query.filter(
+            RenderedComponent.project_id == project.id,
+            RenderedComponent.component_id.in_(removed)
+        ).delete(synchronize_session=False)
+
+def project_fragments(project, components):
+    """Rendered HTML for each component, re-rendering only stale or missing entries.
+
+    A stored render is reused only when its content_key matches the
+    component being exported, so a render stored by an export that raced
+    with a save can never be served for the newer content. Returns a list
+    aligned with components. Components without an id, or repeating an
+    earlier id, get None and are rendered at export time.
+    """
+    rows = {row.component_id: row for row in RenderedComponent.query.filter_by(project_id=project.id)}
+    fragments = []
+    seen = set()
+    changed = False
+    
+    for component in components:
+        if component.get('id') is None or str(component['id']) in seen:
+            fragments.append(None)
+            continue
+        cid = str(component['id'])
+        seen.add(cid)
+        
+        row = rows.get(cid)
+        key = FragmentCache.key(component)
+        if row is None or row.content_key != key or row.fingerprint != RENDER_FINGERPRINT:
+            if row is None:
+                row = RenderedComponent(project_id=project.id, component_id=cid)
+                db.session.add(row)
+            row.html = fragment_cache.render(component, key)
+            row.fingerprint = RENDER_FINGERPRINT
+            row.content_key = key
+            changed = True
+        fragments.append(row.html)
+    
+    if changed:
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent export stored the same renders first
+            db.session.rollback()
+    return fragments
+
+# Revisions
+def canonical_json(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+def store_blobs(values):
+    """Store JSON values as content-addressed blobs and return their hashes in order.
+
+    Reused blobs get their created_at refreshed in the same transaction, so
+    purge_revision_blobs cannot treat a blob a new revision has just taken
+    up as old and unreferenced. Blobs refreshed within the last half of
+    REVISION_BLOB_GRACE are left alone to keep saves from rewriting them.
+    """
+    encoded = [canonical_json(value) for value in values]
+    hashes = [hashlib.sha256(data.encode('utf-8')).hexdigest() for data in encoded]
+    
+    existing = set()
+    stale = []
+    refresh_before = datetime.utcnow() - app.config['REVISION_BLOB_GRACE'] / 2
+    unique = list(dict.fromkeys(hashes))
+    for start in range(0, len(unique), 500):
+        batch = unique[start:start + 500]
+        for blob_hash, created_at in db.session.query(RevisionBlob.hash, RevisionBlob.created_at) \
+                .filter(RevisionBlob.hash.in_(batch)):
+            existing.add(blob_hash)
+            if created_at is None or created_at < refresh_before:
+                stale.append(blob_hash)
+    for start in range(0, len(stale), 500):
+        RevisionBlob.query.filter(RevisionBlob.hash.in_(stale[start:start + 500])) \
+            .update({'created_at': datetime.utcnow()}, synchronize_session=False)
+    
+    for blob_hash, data in zip(hashes, encoded):
+        if blob_hash in existing:
+            continue
+        existing.add(blob_hash)
+        try:
+            # Savepoint, so a blob another worker stored first does not fail the save
+            with db.session.begin_nested():
+                db.session.add(RevisionBlob(hash=blob_hash, data=data, uploads_indexed=True))
+                for upload in referenced_uploads(data):
+                    db.session.add(RevisionUpload(upload=upload, blob_hash=blob_hash))
+        except IntegrityError:
+            pass
+    return hashes
+
+def record_revision(project):
+    """Add a revision for the project's current state; unchanged components reuse existing blobs"""
+    components = json.loads(project.content or '[]')
+    hashes = store_blobs(components + [json.loads(project.settings or '{}')])
+    db.session.add(ProjectRevision(
+        project_id=project.id,
+        version=project.version,
+        name=project.name,
+        component_hashes=json.dumps(hashes[:-1]),
+        settings_hash=hashes[-1]
+    ))
+    if project.version and project.version % 10 == 0:
+        compact_revisions(project.id)
+
+def load_blobs(hashes):
+    values = {}
+    unique = list(set(hashes))
+    for start in range(0, len(unique), 500):
+        for blob in RevisionBlob.query.filter(RevisionBlob.hash.in_(unique[start:start + 500])):
+            values[blob.hash] = json.loads(blob.data)
+    return values
+
+def load_revision(revision):
+    """Rebuild a revision's component list and settings from its blobs"""
+    hashes = json.loads(revision.component_hashes)
+    values = load_blobs(hashes + [revision.settings_hash])
+    return [values[blob_hash] for blob_hash in hashes], values.get(revision.settings_hash, {})
+
+def revision_json(revision):
+    return {
+        'id': revision.id,
+        'version': revision.version,
+        'name': revision.name,
+        'components': len(json.loads(revision.component_hashes)),
+        'created_at': revision.created_at.isoformat() if revision.created_at else None
+    }
+
+def diff_revisions(base, revision):
+    """Component-level changes from base to revision, matching components by id"""
+    new_hashes = json.loads(revision.component_hashes)
+    old_hashes = json.loads(base.component_hashes) if base else []
+    values = load_blobs(new_hashes + old_hashes)
+    
+    def by_id(hashes):
+        return {str(values[h].get('id', f'#{i}')): h for i, h in enumerate(hashes)}
+    
+    def common_order(ids):
+        return [cid for cid in ids if cid in old and cid in new]
+    
+    old, new = by_id(old_hashes), by_id(new_hashes)
+    return {
+        'from': base.id if base else None,
+        'to': revision.id,
+        'added': [cid for cid in new if cid not in old],
+        'removed': [cid for cid in old if cid not in new],
+        'changed': [cid for cid in new if cid in old and old[cid] != new[cid]],
+        'reordered': common_order(old) != common_order(new),
+        'name_changed': base is None or base.name != revision.name,
+        'settings_changed': base is None or base.settings_hash != revision.settings_hash
+    }
+
+def compact_revisions(project_id):
+    """Apply the retention policy: keep recent revisions, then one per day, then none"""
+    revisions = ProjectRevision.query.filter_by(project_id=project_id).order_by(ProjectRevision.id.desc()).all()
+    cutoff = datetime.utcnow() - timedelta(days=app.config['REVISIONS_KEEP_DAYS'])
+    days = set()
+    removed = 0
+    for revision in revisions[app.config['REVISIONS_KEEP_RECENT']:]:
+        day = revision.created_at.date()
+        if revision.created_at < cutoff or day in days:
+            db.session.delete(revision)
+            removed += 1
+        else:
+            days.add(day)
+    return removed
+
+def purge_revision_blobs():
+    """Delete blobs no revision refers to; returns the number removed"""
+    referenced = set()
+    for component_hashes, settings_hash in db.session.query(ProjectRevision.component_hashes,
+                                                             ProjectRevision.settings_hash):
+        referenced.update(json.loads(component_hashes))
+        referenced.add(settings_hash)
+    
+    cutoff = datetime.utcnow() - app.config['REVISION_BLOB_GRACE']
+    unreferenced = [blob_hash for (blob_hash,) in db.session.query(RevisionBlob.hash).filter(RevisionBlob.created_at < cutoff)
+                    if blob_hash not in referenced]
+    removed = 0
+    for start in range(0, len(unreferenced), 500):
+        # Recheck the age, in case a save reused the blob after the scan above
+        batch = [blob_hash for (blob_hash,) in db.session.query(RevisionBlob.hash).filter(
+            RevisionBlob.hash.in_(unreferenced[start:start + 500]),
+            RevisionBlob.created_at < cutoff
+        ).with_for_update()]
+        RevisionUpload.query.filter(RevisionUpload.blob_hash.in_(batch)).delete(synchronize_session=False)
+        removed += RevisionBlob.query.filter(RevisionBlob.hash.in_(batch)).delete(synchronize_session=False)
+    return removed
+
+@app.cli.command('compact-revisions')
+def compact_revisions_command():
+    """Apply revision retention to every project and purge unreferenced blobs"""
+    removed = 0
+    for (project_id,) in db.session.query(Project.id):
+        removed += compact_revisions(project_id)
+    db.session.commit()
+    blobs = purge_revision_blobs()
+    db.session.commit()
+    print(f'Removed {removed} revisions and {blobs} unreferenced blobs')
+
+@app.cli.command('compress-projects')
+@click.option('--batch-size', default=500, show_default=True, help='projects rewritten per transaction')
+def compress_projects_command(batch_size):
+    """Rewrite project content and settings stored before compression"""
+    compressor = CompressedJSON()
+    last_id = 0
+    rewritten = 0
+    while True:
+        rows = db.session.execute(
+            text('SELECT id, content, settings FROM project WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': batch_size}
+        ).all()
+        if not rows:
+            break
+        
+        for project_id, content, settings in rows:
+            stored = [content, settings]
+            if all(value is None or (isinstance(value, bytes) and value[:1] == CompressedJSON.FORMAT_ZLIB)
+                   for value in stored):
+                continue
+            content, settings = (compressor.process_result_value(value, None) for value in stored)
+            db.session.execute(
+                db.update(Project.__table__).where(Project.__table__.c.id == project_id)
+                .values(content=content, settings=settings, updated_at=Project.__table__.c.updated_at)
+            )
+            rewritten += 1
+        db.session.commit()
+        last_id = rows[-1][0]
+        print(f'Compressed {rewritten} projects (up to id {last_id})')
+    print(f'Done: {rewritten} projects compressed')
+
+def json_bytes(value):
+    """Compact UTF-8 JSON, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def json_value(text):
+    """Parse JSON text, through orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+# Upload Garbage Collection
+DERIVED_UPLOAD = re.compile(r'^[0-9a-f]{64}(?:-\d+w\.\w+|\.json)$')  # derivatives and manifests go with their source
+
+def referenced_uploads(*texts):
+    """Upload paths, relative to UPLOAD_FOLDER, that appear in the given texts"""
+    return {match.group(1) for text in texts if text for match in UPLOAD_REFERENCE.finditer(text)}
+
+def index_project_uploads(project):
+    """Bring a project's UploadReference rows in line with its content and settings"""
+    wanted = referenced_uploads(project.content, project.settings)
+    existing = {reference.upload: reference for reference in
+                UploadReference.query.filter_by(project_id=project.id)}
+    for upload in existing.keys() - wanted:
+        db.session.delete(existing[upload])
+    for upload in wanted - existing.keys():
+        db.session.add(UploadReference(project_id=project.id, upload=upload))
+
+def index_revision_blob_uploads(blob):
+    """Add RevisionUpload rows for a blob stored before the index existed"""
+    for upload in referenced_uploads(blob.data):
+        db.session.add(RevisionUpload(upload=upload, blob_hash=blob.hash))
+    blob.uploads_indexed = True
+
+def iter_upload_files(folder, after=None):
+    """Yield upload paths in sorted order, starting after the path `after`.
+
+    Whole directories that sort before `after` are skipped without being
+    listed, so a run that resumes deep into the tree starts quickly.
+    """
+    after = tuple(after.split('/')) if after else ()
+    
+    def walk(parts):
+        try:
+            names = sorted(os.listdir(os.path.join(folder, *parts)))
+        except FileNotFoundError:
+            return
+        for name in names:
+            path = parts + (name,)
+            if os.path.isdir(os.path.join(folder, *path)):
+                if path < after[:len(path)]:
+                    continue
+                yield from walk(path)
+            elif path > after:
+                yield '/'.join(path)
+    
+    yield from walk(())
+
+def remove_upload(folder, upload, dry_run=False):
+    """Delete an upload with its derivatives and manifest; returns the bytes freed
+
+    The manifest goes first, so renderers stop listing the derivatives before
+    they disappear, and the original goes last.
+    """
+    directory, name = os.path.split(os.path.join(folder, upload))
+    stem = name.rsplit('.', 1)[0]
+    freed = 0
+    for sibling in sorted(os.listdir(directory), key=lambda sibling: (sibling != f'{stem}.json', sibling == name)):
+        if sibling == name or (DERIVED_UPLOAD.match(sibling) and sibling.startswith((f'{stem}-', f'{stem}.'))):
+            path = os.path.join(directory, sibling)
+            try:
+                freed += os.path.getsize(path)
+                if not dry_run:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+    return freed
+
+@app.cli.command('gc-uploads')
+@click.option('--grace-days', default=7, show_default=True, type=float,
+              help='keep unreferenced files younger than this; saves can lag behind uploads')
+@click.option('--batch', default=1000, show_default=True, help='files examined per run')
+@click.option('--rate', default=50.0, show_default=True, help='maximum files deleted per second')
+@click.option('--dry-run', is_flag=True, help='report what would be removed without deleting')
+def gc_uploads_command(grace_days, batch, rate, dry_run):
+    """Delete uploads no project uses, resuming where the previous run stopped"""
+    # Projects and revision blobs saved before the indexes existed are indexed first,
+    # so their files are never mistaken for orphans
+    while True:
+        projects = Project.query.filter(or_(Project.uploads_indexed.is_(None), Project.uploads_indexed.is_(False))) \
+            .limit(100).all()
+        if not projects:
+            break
+        for project in projects:
+            index_project_uploads(project)
+        # Set the flag with a Core UPDATE so the backfill does not move updated_at
+        db.session.execute(
+            db.update(Project.__table__).where(Project.__table__.c.id.in_([project.id for project in projects]))
+            .values(uploads_indexed=True, updated_at=Project.__table__.c.updated_at)
+        )
+        db.session.commit()
+    while True:
+        blobs = RevisionBlob.query.filter(or_(RevisionBlob.uploads_indexed.is_(None),
+                                              RevisionBlob.uploads_indexed.is_(False))).limit(100).all()
+        if not blobs:
+            break
+        for blob in blobs:
+            index_revision_blob_uploads(blob)
+        db.session.commit()
+    
+    folder = app.config['UPLOAD_FOLDER']
+    cursor_path = os.path.join(app.instance_path, 'upload_gc_cursor')
+    after = None
+    if os.path.exists(cursor_path):
+        with open(cursor_path) as f:
+            after = f.read().strip() or None
+    
+    cutoff = time.time() - grace_days * 86400
+    files = []
+    for upload in iter_upload_files(folder, after):
+        files.append(upload)
+        if len(files) >= batch:
+            break
+    
+    candidates = []
+    for upload in files:
+        name = os.path.basename(upload)
+        if DERIVED_UPLOAD.match(name):
+            continue
+        try:
+            if os.path.getmtime(os.path.join(folder, upload)) >= cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        candidates.append(upload)
+    
+    # Kept revisions count too: restoring one would need its files back
+    referenced = set()
+    for start in range(0, len(candidates), 500):
+        chunk = candidates[start:start + 500]
+        for index in (UploadReference, RevisionUpload):
+            referenced.update(upload for (upload,) in db.session.query(index.upload)
+                              .filter(index.upload.in_(chunk)).distinct())
+    
+    removed = freed = 0
+    for upload in candidates:
+        if upload in referenced:
+            continue
+        freed += remove_upload(folder, upload, dry_run)
+        if dry_run:
+            print(f'Would remove {upload}')
+        else:
+            time.sleep(1 / rate)
+        removed += 1
+    
+    # Wrap around once the end of the tree is reached
+    next_after = files[-1] if len(files) >= batch else ''
+    if not dry_run:
+        with open(cursor_path, 'w') as f:
+            f.write(next_after)
+    print(f'Examined {len(files)} files, {"would remove" if dry_run else "removed"} {removed} '
+          f'and {"would reclaim" if dry_run else "reclaimed"} {freed} bytes' + (f'; next run resumes after {next_after}' if next_after else ''))
+
+# Project Listing
+LISTING_COLUMNS = (Project.id, Project.name, Project.version, Project.created_at, Project.updated_at)
+
+def project_listing(user_id, after=None, limit=24):
+    """One page of a user's projects, most recently updated first, without content or settings.
+
+    Pages are keyset paginated on (updated_at, id), which ix_project_user_updated
+    covers, so every page costs the same however many projects the user has.
+    after is the (updated_at, id) of the last row of the previous page. Returns
+    the rows and the cursor for the next page, or None on the last page.
+    """
+    query = db.session.query(*LISTING_COLUMNS).filter(Project.user_id == user_id)
+    if after is not None:
+        updated_at, project_id = after
+        query = query.filter(or_(
+            Project.updated_at < updated_at,
+            and_(Project.updated_at == updated_at, Project.id < project_id)
+        ))
+    rows = query.order_by(Project.updated_at.desc(), Project.id.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f'{rows[-1].updated_at.isoformat()}_{rows[-1].id}'
+    return rows, next_cursor
+
+def parse_listing_cursor(cursor):
+    """Turn a next_cursor string back into (updated_at, id); raises ValueError if malformed"""
+    if not cursor:
+        return None
+    updated_at, _, project_id = cursor.rpartition('_')
+    return datetime.fromisoformat(updated_at), int(project_id)
+
+# Saving Projects
+def document_hash(name, content, settings):
+    """Hash of a project's saved document that ignores JSON formatting differences"""
+    document = [name, json.loads(content or '[]'), json.loads(settings or '{}')]
+    canonical = json.dumps(document, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def apply_project_changes(project, changes):
+    """Write saved fields (name, content, settings, version, content_hash) onto a project row"""
+    if 'content' in changes:
+        prune_rendered_components(project, json.loads(project.content), json.loads(changes['content']))
+        project.content = changes['content']
+    if 'name' in changes:
+        project.name = changes['name']
+    if 'settings' in changes:
+        project.settings = changes['settings']
+    if 'version' in changes:
+        project.version = changes['version']
+    if 'content_hash' in changes:
+        project.content_hash = changes['content_hash']
+    if {'content', 'settings'} & set(changes):
+        index_project_uploads(project)
+        project.uploads_indexed = True
+    if {'name', 'content', 'settings'} & set(changes):
+        record_revision(project)
+
+def commit_project_changes(project, changes):
+    """Apply and commit a save; False (and rolled back) when another worker saved the row first"""
+    try:
+        apply_project_changes(project, changes)
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return False
+    return True
+
+# Export Jobs
+EXPORT_ARTIFACTS = {
+    'html': ('html', 'text/html'),
+    'zip': ('zip', 'application/zip'),
+    'react': ('jsx', 'text/javascript'),
+    'vue': ('vue', 'text/plain')
+}
+
+export_pool = None
+export_pool_lock = threading.Lock()
+
+def get_export_pool():
+    """Create this worker's export process pool on first use"""
+    global export_pool
+    with export_pool_lock:
+        if export_pool is None:
+            export_pool = ProcessPoolExecutor(max_workers=app.config['EXPORT_POOL_WORKERS'])
+        return export_pool
+
+def build_export_artifact(format, project_name, components, settings, path, minify=False, fragments=None):
+    """Render an export to disk; runs inside the export process pool.
+
+    Text artifacts also get a gzip sibling at path + '.gz'. Returns the
+    path and the artifact's sha256 for use as its ETag.
+    """
+    project = Project(name=project_name)
+    if format == 'zip':
+        chunks = iter_zip(zip_entries(project, components, settings, minify, fragments))
+    elif format == 'html':
+        chunks = (chunk.encode('utf-8') for chunk in iter_html(components, settings, minify=minify, fragments=fragments))
+    elif format == 'react':
+        chunks = [generate_react(components, settings).encode('utf-8')]
+    else:
+        chunks = [generate_vue(components, settings).encode('utf-8')]
+    
+    digest = hashlib.sha256()
+    tmp_path = path + '.part'
+    with open(tmp_path, 'wb') as f:
+        gz = None if format == 'zip' else gzip.GzipFile(tmp_path + '.gz', 'wb', compresslevel=9, mtime=0)
+        for chunk in chunks:
+            digest.update(chunk)
+            f.write(chunk)
+            if gz:
+                gz.write(chunk)
+        if gz:
+            gz.close()
+            os.replace(tmp_path + '.gz', path + '.gz')
+    os.replace(tmp_path, path)
+    return path, digest.hexdigest()
+
+def render_export_files(project_name, components, settings, minify=False):
+    """Render a project's ZIP package files to strings; runs inside the export process pool.
+
+    Returns the files and the ExportAssets mapping of the uploads they reference,
+    which the caller streams from disk itself rather than passing them back.
+    """
+    project = Project(name=project_name)
+    assets = ExportAssets()
+    files = [(name, ''.join(chunks)) for name, chunks in package_files(project, components, settings, minify,
+                                                                        assets=assets)]
+    return files, assets.files
+
+def iter_bulk_export_entries(tasks, minify=False):
+    """Yield ZIP entries for several projects, one directory each, as the pool finishes them.
+
+    tasks holds (directory, project_id) pairs. A project is loaded from the
+    database only when its render is submitted, and only a couple of renders
+    per pool process are in flight, so memory stays bounded by the pool size
+    rather than the number of projects. Needs an app context for the loads.
+    """
+    pool = get_export_pool()
+    max_in_flight = app.config['EXPORT_POOL_WORKERS'] * 2
+    pending = {}
+    tasks = iter(tasks)
+    
+    while True:
+        for directory, project_id in tasks:
+            project = db.session.query(Project.name, Project.content, Project.settings).filter_by(id=project_id).first()
+            if project is None:
+                yield f'{directory}/ERROR.txt', ['Export failed: project was deleted\n']
+                continue
+            name, content, settings = project
+            future = pool.submit(render_export_files, name, json.loads(content), json.loads(settings), minify)
+            pending[future] = directory
+            if len(pending) >= max_in_flight:
+                break
+        if not pending:
+            return
+        
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            directory = pending.pop(future)
+            error = future.exception()
+            if error is not None:
+                yield f'{directory}/ERROR.txt', [f'Export failed: {error}\n']
+                continue
+            files, assets = future.result()
+            for name, content in files:
+                yield f'{directory}/{name}', [content]
+            yield from ExportAssets(assets).entries(f'{directory}/')
+
+def submit_export_job(job, project):
+    """Queue a job on the process pool and record its outcome when it finishes"""
+    extension, _ = EXPORT_ARTIFACTS[job.format]
+    path = os.path.abspath(os.path.join(app.config['EXPORT_FOLDER'], f'{job.id}.{extension}'))
+    job_id = job.id
+    
+    def finished(future):
+        with app.app_context():
+            finished_job = ExportJob.query.get(job_id)
+            if finished_job is None:
+                # Project was deleted while the export was running
+                if future.exception() is None:
+                    for leftover in (path, path + '.gz'):
+                        if os.path.exists(leftover):
+                            os.remove(leftover)
+                return
+            error = future.exception()
+            if error is None:
+                finished_job.status = 'done'
+                finished_job.artifact_path, finished_job.etag = future.result()
+            else:
+                finished_job.status = 'failed'
+                finished_job.error = str(error) or error.__class__.__name__
+            finished_job.finished_at = datetime.utcnow()
+            db.session.commit()
+    
+    try:
+        components = json.loads(project.content)
+        fragments = project_fragments(project, components) if job.format in ('html', 'zip') else None
+        future = get_export_pool().submit(build_export_artifact, job.format, project.name,
+                                          components, json.loads(project.settings),
+                                          path, job.minify, fragments)
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return
+    future.add_done_callback(finished)
+
+def remove_export_artifact(job):
+    if job.artifact_path:
+        for path in (job.artifact_path, job.artifact_path + '.gz'):
+            if os.path.exists(path):
+                os.remove(path)
+
+def export_job_json(job):
+    status, error = job.status, job.error
+    cutoff = datetime.utcnow() - timedelta(seconds=app.config['EXPORT_JOB_TIMEOUT'])
+    if status == 'queued' and job.created_at and job.created_at < cutoff:
+        # The worker building it went away; the next export request replaces it
+        status, error = 'failed', 'Export timed out'
+    
+    result = {
+        'id': job.id,
+        'project_id': job.project_id,
+        'format': job.format,
+        'minify': job.minify,
+        'status': status,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+    if status == 'done':
+        result['result_url'] = url_for('get_export_job_result', job_id=job.id)
+    if error:
+        result['error'] = error
+    return result
+
+# Schema Upgrades
+def missing_columns(inspector):
+    """(table, column) pairs the models define but an existing table lacks"""
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                yield table, column
+
+def retyped_columns(inspector):
+    """(table, column) pairs of compressed columns an existing table still stores as text"""
+    if inspector.dialect.name == 'sqlite':
+        return  # SQLite keeps bytes as they are in any column
+    for table in db.metadata.sorted_tables:
+        compressed = [column for column in table.columns if isinstance(column.type, CompressedJSON)]
+        if not compressed or not inspector.has_table(table.name):
+            continue
+        existing = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+        for column in compressed:
+            if column.name in existing and existing[column.name].python_type is not bytes:
+                yield table, column
+
+def upgrade_schema():
+    """Add columns and indexes introduced since a table was first created.
+
+    create_all only creates missing tables, so existing databases would
+    otherwise never pick up new model fields. Names are quoted and defaults
+    rendered by the database's own dialect, so reserved words such as
+    "user" and boolean defaults work on PostgreSQL and MySQL too. Text
+    columns from before compressed storage are converted to binary.
+    """
+    dialect = db.engine.dialect
+    preparer = dialect.identifier_preparer
+    inspector = db.inspect(db.engine)
+    for table, column in list(retyped_columns(inspector)):
+        # Existing rows keep their UTF-8 bytes, which CompressedJSON reads as plain JSON
+        name = preparer.format_column(column)
+        if dialect.name == 'postgresql':
+            ddl = (f'ALTER TABLE {preparer.format_table(table)} ALTER COLUMN {name} '
+                   f"TYPE {column.type.compile(dialect)} USING convert_to({name}, 'UTF8')")
+        else:
+            ddl = f'ALTER TABLE {preparer.format_table(table)} MODIFY {name} {column.type.compile(dialect)}'
+        db.session.execute(text(ddl))
+    db.session.commit()
+    
+    for table, column in list(missing_columns(inspector)):
+        ddl = (f'ALTER TABLE {preparer.format_table(table)} '
+               f'ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect)}')
+        default = column.default.arg if column.default is not None and column.default.is_scalar else None
+        if default is not None:
+            try:
+                value = literal(default, type_=column.type).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+                ddl += f' DEFAULT {value}'
+            except CompileError:
+                pass  # types with no SQL literal (compressed JSON) leave existing rows NULL
+        db.session.execute(text(ddl))
+    db.session.commit()
+    
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(db.engine)
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Create missing tables and add columns and indexes added since the last deploy"""
+    db.create_all()
+    upgrade_schema()
+    print('Database schema is up to date')
+
 # Initialize database
 with app.app_context():
     db.create_all()
+    # Altering tables is left to `flask upgrade-db`, run once per deploy, so that
+    # workers starting together never race on DDL
+    inspector = db.inspect(db.engine)
+    if next(missing_columns(inspector), None) is not None or next(retyped_columns(inspector), None) is not None:
+        app.logger.warning('Database schema is out of date; run `flask --app app upgrade-db`')
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,170 @@
+"""Concurrent autosave benchmark for the database layer.
+
+Starts several worker processes, like gunicorn workers, that share one
+SQLite database and hammer it with autosaves and project reads. Each
+configuration runs against a fresh database file, so SQLite's default
+settings can be compared with the tuned pragmas the app applies:
+
+    python benchmarks/db_concurrency_benchmark.py --workers 4 --duration 10
+    python benchmarks/db_concurrency_benchmark.py --output db.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIGURATIONS = {
+    # Empty values leave SQLite's own defaults in place (rollback journal, synchronous=FULL)
+    'sqlite_defaults': {'SQLITE_JOURNAL_MODE': '', 'SQLITE_BUSY_TIMEOUT': '', 'SQLITE_SYNCHRONOUS': ''},
+    'sqlite_tuned': {'SQLITE_JOURNAL_MODE': 'WAL', 'SQLITE_BUSY_TIMEOUT': '5000', 'SQLITE_SYNCHRONOUS': 'NORMAL'},
+}
+
+
+def page(revision, size):
+    """A builder page whose text changes with every save"""
+    return [{'id': i, 'type': 'text', 'data': {'heading': f'Section {i}', 'content': f'Revision {revision}. ' * 20}}
+            for i in range(size)]
+
+
+def load_app(workdir, env):
+    os.chdir(workdir)
+    os.environ.update(env)
+    sys.path.insert(0, ROOT)
+    import app as webmaker
+    return webmaker
+
+
+def worker(index, workdir, env, args, barrier, results):
+    webmaker = load_app(workdir, env)
+    client = webmaker.app.test_client()
+    name = f'bench{index}'
+    for _ in range(50):
+        # Workers set up at the same time, so the baseline can fail here too
+        try:
+            client.post('/register', json={'username': name, 'email': f'{name}@example.com', 'password': 'benchmark'})
+            client.post('/login', json={'username': name, 'password': 'benchmark'})
+            client.post('/api/upgrade')
+            response = client.post('/api/projects', json={'name': name})
+            if response.status_code == 200:
+                project_id = response.get_json()['id']
+                break
+        except Exception:
+            pass
+        time.sleep(0.1)
+    else:
+        results.put({'setup_failed': True})
+        barrier.abort()
+        return
+
+    try:
+        barrier.wait(timeout=60)
+    except threading.BrokenBarrierError:
+        results.put({'setup_failed': True})
+        return
+    saves = reads = errors = operations = 0
+    latencies = []
+    deadline = time.perf_counter() + args.duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if operations % (args.reads_per_save + 1) == 0:
+                response = client.put(f'/api/projects/{project_id}',
+                                      json={'content': json.dumps(page(saves, args.components))})
+                ok = response.status_code == 200
+                saves += ok
+                latencies.append(time.perf_counter() - start)
+            else:
+                response = client.get(f'/api/projects/{project_id}')
+                ok = response.status_code == 200
+                reads += ok
+        except Exception:
+            ok = False
+        errors += not ok
+        operations += 1
+    results.put({'saves': saves, 'reads': reads, 'errors': errors, 'latencies': latencies})
+
+
+def run_configuration(name, env, args):
+    workdir = tempfile.mkdtemp(prefix=f'dbbench-{name}-')
+    env = dict(env, DATABASE_URI=f'sqlite:///{os.path.join(workdir, "bench.db")}', SECRET_KEY='benchmark')
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(args.workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(i, workdir, env, args, barrier, results))
+                 for i in range(args.workers)]
+    try:
+        # Create the schema once up front; workers importing the app together would race on it
+        setup = context.Process(target=load_app, args=(workdir, env))
+        setup.start()
+        setup.join()
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = sorted(latency for report in reports for latency in report.get('latencies', []))
+    saves = sum(report.get('saves', 0) for report in reports)
+    reads = sum(report.get('reads', 0) for report in reports)
+    return {
+        'workers': args.workers,
+        'setup_failures': sum(1 for report in reports if report.get('setup_failed')),
+        'saves': saves,
+        'reads': reads,
+        'errors': sum(report.get('errors', 0) for report in reports),
+        'saves_per_second': saves / args.duration,
+        'reads_per_second': reads / args.duration,
+        'save_latency_median': statistics.median(latencies) if latencies else None,
+        'save_latency_p95': latencies[int(len(latencies) * 0.95)] if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='concurrent worker processes')
+    parser.add_argument('--duration', type=float, default=10, help='seconds each configuration runs')
+    parser.add_argument('--components', type=int, default=20, help='components on each saved page')
+    parser.add_argument('--reads-per-save', type=int, default=3, help='project reads between saves')
+    parser.add_argument('--output', help='write results JSON to this file (default: stdout)')
+    args = parser.parse_args()
+
+    results = {name: run_configuration(name, env, args) for name, env in CONFIGURATIONS.items()}
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'workers': args.workers,
+            'duration': args.duration,
+            'components': args.components,
+            'reads_per_save': args.reads_per_save,
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    for name, result in results.items():
+        print(f'{name:20s} {result["saves_per_second"]:8.1f} saves/s {result["reads_per_second"]:8.1f} reads/s '
+              f'{result["errors"]:6d} errors', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
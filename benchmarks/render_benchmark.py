@@ -0,0 +1,271 @@
+"""Rendering benchmarks for the export pipeline.
+
+Builds synthetic projects with every component type the exporter renders
+and times each export format. Results are written as JSON so runs from
+different commits can be compared:
+
+    python benchmarks/render_benchmark.py --output before.json
+    python benchmarks/render_benchmark.py --output after.json --compare before.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as webmaker
+
+
+def repeat(items, count):
+    return [items(i) for i in range(count)]
+
+
+def sample_data(comp_type, list_size):
+    """Component data shaped like the builder's templates, with list fields of list_size entries"""
+    image = 'https://via.placeholder.com/800x600'
+    samples = {
+        'hero': lambda: {'title': 'Welcome to Your Website', 'subtitle': 'Build amazing things with drag and drop',
+                         'buttonText': 'Get Started', 'buttonUrl': '#', 'backgroundType': 'gradient',
+                         'gradientStart': '#667eea', 'gradientEnd': '#764ba2', 'textAlign': 'center',
+                         'minHeight': '400px', 'textColor': '#ffffff', 'buttonColor': '#0066cc',
+                         'buttonTextColor': '#ffffff'},
+        'text': lambda: {'heading': 'About Us', 'content': 'Lorem ipsum dolor sit amet. ' * 20},
+        'image': lambda: {'src': image, 'alt': 'Sample image'},
+        'features': lambda: {'heading': 'Our Features', 'features': repeat(
+            lambda i: {'icon': '⚡', 'title': f'Feature {i}', 'description': 'Fast, reliable and simple to use.'},
+            list_size)},
+        'cta': lambda: {'heading': 'Ready to Get Started?', 'subtitle': 'Join us today',
+                        'buttonText': 'Sign Up', 'buttonUrl': '#'},
+        'gallery': lambda: {'images': repeat(lambda i: f'{image}?{i}', list_size)},
+        'testimonials': lambda: {'heading': 'What Our Customers Say', 'testimonials': repeat(
+            lambda i: {'text': 'Great service, would recommend!', 'name': f'Customer {i}', 'role': 'CEO', 'rating': 5},
+            list_size)},
+        'team': lambda: {'heading': 'Meet Our Team', 'members': repeat(
+            lambda i: {'image': image, 'name': f'Member {i}', 'role': 'Engineer', 'bio': 'Builds things.'},
+            list_size)},
+        'stats': lambda: {'backgroundColor': '#f8fafc', 'stats': repeat(
+            lambda i: {'number': f'{i * 100}+', 'label': 'Happy customers'}, list_size)},
+        'faq': lambda: {'heading': 'FAQ', 'faqs': repeat(
+            lambda i: {'question': f'Question {i}?', 'answer': 'An answer to the question.'}, list_size)},
+        'contact': lambda: {'heading': 'Get In Touch', 'subtitle': 'We reply within a day',
+                            'backgroundColor': '#ffffff'},
+        'newsletter': lambda: {'heading': 'Subscribe', 'subtitle': 'Get updates', 'buttonText': 'Subscribe',
+                               'backgroundType': 'solid', 'backgroundColor': '#0066cc'},
+        'logos': lambda: {'heading': 'Trusted By', 'logos': repeat(lambda i: f'{image}?logo={i}', list_size)},
+        'timeline': lambda: {'heading': 'Our Journey', 'events': repeat(
+            lambda i: {'year': str(2000 + i), 'title': f'Milestone {i}', 'description': 'Something happened.'},
+            list_size)},
+        'video': lambda: {'title': 'Watch Our Video', 'url': 'https://www.youtube.com/embed/dQw4w9WgXcQ',
+                          'maxWidth': '800px', 'aspectRatio': '16/9'},
+        'footer': lambda: {'companyName': 'Company', 'tagline': 'Tagline', 'copyright': '© 2025 Company',
+                           'columns': repeat(lambda i: {'title': f'Column {i}',
+                                                        'links': ['About', 'Careers', 'Contact']}, 4)},
+        'navbar': lambda: {'brand': 'Brand', 'links': ['Home', 'About', 'Services', 'Contact'],
+                           'ctaText': 'Get Started', 'ctaUrl': '#', 'sticky': True, 'backgroundColor': '#ffffff'},
+        'pricing': lambda: {'heading': 'Choose Your Plan', 'plans': repeat(
+            lambda i: {'name': f'Plan {i}', 'price': str(9 * (i + 1)), 'buttonText': 'Choose Plan',
+                       'buttonUrl': '#', 'features': [f'Feature {n}' for n in range(list_size)]},
+            list_size)},
+        'accordion': lambda: {'heading': 'FAQ', 'items': repeat(
+            lambda i: {'title': f'Item {i}', 'content': 'Details about the item.'}, list_size)},
+        'tabs': lambda: {'tabs': repeat(lambda i: {'title': f'Tab {i}', 'content': 'Tab content.'}, list_size)},
+        'cards': lambda: {'heading': 'Our Services', 'cards': repeat(
+            lambda i: {'icon': '🚀', 'title': f'Service {i}', 'description': 'What we offer.'}, list_size)},
+        'countdown': lambda: {'heading': 'Coming Soon', 'subtitle': 'Stay tuned', 'targetDate': '2030-12-31',
+                              'targetTime': '23:59:59', 'backgroundColor': '#667eea', 'textColor': '#ffffff'},
+        'quote': lambda: {'quote': 'Simplicity is the ultimate sophistication.', 'author': 'Leonardo da Vinci',
+                          'backgroundColor': '#f8fafc', 'quoteSize': '2rem'},
+        'steps': lambda: {'heading': 'How It Works', 'steps': repeat(
+            lambda i: {'number': str(i + 1), 'title': f'Step {i + 1}', 'description': 'Do the thing.'}, list_size)},
+        'banner': lambda: {'text': 'Announcement text', 'buttonText': 'Learn More', 'buttonUrl': '#',
+                           'dismissible': True, 'backgroundColor': '#0066cc', 'textColor': '#ffffff'},
+        'metrics': lambda: {'backgroundColor': '#ffffff', 'metrics': repeat(
+            lambda i: {'icon': '📈', 'number': f'{i}k', 'label': 'Downloads'}, list_size)},
+        'portfolio': lambda: {'heading': 'Our Work', 'projects': repeat(
+            lambda i: {'image': image, 'category': 'Design', 'title': f'Project {i}'}, list_size)},
+        'columns': lambda: {'backgroundColor': '#ffffff', 'columnCount': 3, 'columns': repeat(
+            lambda i: {'content': 'Column content. ' * 10}, 3)},
+        'separator': lambda: {'spacing': '3rem', 'thickness': '2px', 'style': 'solid', 'color': '#e2e8f0',
+                              'width': '50%'},
+        'graph': lambda: {'heading': 'Chart', 'height': '400px', 'showLegend': True,
+                          'labels': [f'L{i}' for i in range(list_size)],
+                          'datasets': [{'label': 'Series', 'color': '#0066cc',
+                                        'data': [i * 10 + 5 for i in range(list_size)]}]},
+    }
+    return samples[comp_type]()
+
+
+def synthetic_project(per_type, list_size, types=None):
+    """A project with per_type components of each registered type, all with distinct data"""
+    components = []
+    next_id = 1
+    for comp_type in types or sorted(webmaker.COMPONENT_RENDERERS):
+        for n in range(per_type):
+            data = sample_data(comp_type, list_size)
+            data['benchmarkCopy'] = n  # keep every component unique so nothing is served from cache
+            components.append({'id': next_id, 'type': comp_type, 'data': data})
+            next_id += 1
+    settings = {'title': 'Benchmark', 'theme': {'primaryColor': '#0066cc'}}
+    return components, settings
+
+
+def zip_export(components, settings):
+    project = webmaker.Project(name='Benchmark')
+    size = 0
+    for chunk in webmaker.iter_zip(webmaker.zip_entries(project, components, settings)):
+        size += len(chunk)
+    return size
+
+
+def output_size(result):
+    if isinstance(result, int):
+        return result
+    return len(result.encode('utf-8'))
+
+
+def measure(fn, components, settings, repeats, warm):
+    """Time fn, then measure its memory and allocations with tracemalloc in a separate run.
+
+    allocations counts the memory blocks the run allocated and still holds
+    when it returns, output included; allocated_blocks is the interpreter's
+    own block count delta over the same run, which includes untraced blocks.
+    """
+    timings = []
+    size = 0
+    for _ in range(repeats):
+        if not warm:
+            webmaker.fragment_cache.clear()
+        gc.collect()
+        start = time.perf_counter()
+        size = output_size(fn(components, settings))
+        timings.append(time.perf_counter() - start)
+
+    if not warm:
+        webmaker.fragment_cache.clear()
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    snapshot_before = tracemalloc.take_snapshot()
+    blocks_before = sys.getallocatedblocks()
+    result = fn(components, settings)
+    blocks_after = sys.getallocatedblocks()
+    snapshot_after = tracemalloc.take_snapshot()
+    del result
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocations = sum(stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, 'filename'))
+
+    best = min(timings)
+    return {
+        'components': len(components),
+        'output_bytes': size,
+        'seconds_min': best,
+        'seconds_median': statistics.median(timings),
+        'components_per_second': len(components) / best if best else None,
+        'bytes_per_second': size / best if best else None,
+        'peak_bytes': peak - before,
+        'retained_bytes': after - before,
+        'allocations': allocations,
+        'allocated_blocks': blocks_after - blocks_before,
+    }
+
+
+def run(args):
+    components, settings = synthetic_project(args.per_type, args.list_size)
+    benchmarks = {
+        'generate_html': lambda c, s: webmaker.generate_html(c, s),
+        'generate_html_minified': lambda c, s: webmaker.generate_html(c, s, minify=True),
+        'generate_css': lambda c, s: webmaker.generate_css(c, s),
+        'generate_react': lambda c, s: webmaker.generate_react(c, s),
+        'generate_vue': lambda c, s: webmaker.generate_vue(c, s),
+        'zip': zip_export,
+    }
+    results = {}
+    for name, fn in benchmarks.items():
+        results[name] = measure(fn, components, settings, args.repeat, warm=False)
+    results['generate_html_warm_cache'] = measure(benchmarks['generate_html'], components, settings,
+                                                  args.repeat, warm=True)
+
+    # Per-type rendering, so a regression in one renderer stands out
+    for comp_type in sorted(webmaker.COMPONENT_RENDERERS):
+        typed, _ = synthetic_project(args.per_type, args.list_size, types=[comp_type])
+        results[f'render_component[{comp_type}]'] = measure(
+            lambda c, s: ''.join(webmaker.render_component(component) for component in c),
+            typed, settings, args.repeat, warm=False)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print the change in best time per benchmark and return the names that regressed"""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not old or not old.get('seconds_min'):
+            continue
+        change = result['seconds_min'] / old['seconds_min'] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f'{name:40s} {old["seconds_min"] * 1000:10.3f}ms -> {result["seconds_min"] * 1000:10.3f}ms '
+              f'({change:+.1%}){flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--per-type', type=int, default=5, help='components of each type per project')
+    parser.add_argument('--list-size', type=int, default=12,
+                        help='entries in list fields such as features, gallery, pricing and timeline')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    parser.add_argument('--output', help='write results JSON to this file (default: stdout)')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='slowdown ratio reported as a regression when comparing')
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'per_type': args.per_type,
+            'list_size': args.list_size,
+            'repeat': args.repeat,
+        },
+        'results': run(args),
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(report['results'], baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -490,8 +490,10 @@ async function loadProject() {
         const response = await fetch(`/api/projects/${projectId}`);
         if (response.ok) {
             const data = await response.json();
-            components = JSON.parse(data.content || '[]');
-            settings = JSON.parse(data.settings || JSON.stringify(settings));
+            components = data.content || [];
+            settings = data.settings || settings;
+            projectVersion = data.version;
+            savedDocument = snapshotDocument();
             applyTheme();
             renderCanvas();
         }
@@ -502,6 +504,98 @@ async function loadProject() {
 
 // Save Project
 let saveTimeout;
+let projectVersion = null;
+let savedDocument = null; // last document the server acknowledged, for delta saves
+
+function snapshotDocument() {
+    return JSON.parse(JSON.stringify({ name: projectTitle.value, components, settings }));
+}
+
+function escapePointer(key) {
+    return String(key).replace(/~/g, '~0').replace(/\//g, '~1');
+}
+
+// Build RFC 6902 operations that turn `before` into `after`
+function diffDocuments(before, after, path = '', ops = []) {
+    if (before === after) return ops;
+    
+    const isObject = value => value !== null && typeof value === 'object' && !Array.isArray(value);
+    
+    if (Array.isArray(before) && Array.isArray(after)) {
+        const common = Math.min(before.length, after.length);
+        for (let i = 0; i < common; i++) {
+            diffDocuments(before[i], after[i], `${path}/${i}`, ops);
+        }
+        for (let i = before.length - 1; i >= after.length; i--) {
+            ops.push({ op: 'remove', path: `${path}/${i}` });
+        }
+        for (let i = before.length; i < after.length; i++) {
+            ops.push({ op: 'add', path: `${path}/-`, value: after[i] });
+        }
+    } else if (isObject(before) && isObject(after)) {
+        for (const key of Object.keys(before)) {
+            if (!(key in after)) {
+                ops.push({ op: 'remove', path: `${path}/${escapePointer(key)}` });
+            } else {
+                diffDocuments(before[key], after[key], `${path}/${escapePointer(key)}`, ops);
+            }
+        }
+        for (const key of Object.keys(after)) {
+            if (!(key in before)) {
+                ops.push({ op: 'add', path: `${path}/${escapePointer(key)}`, value: after[key] });
+            }
+        }
+    } else {
+        ops.push({ op: 'replace', path, value: after });
+    }
+    return ops;
+}
+
+// Send the current document, as a patch against the last saved version when that is smaller
+let saveChain = Promise.resolve();
+
+function persistProject() {
+    // One save at a time, so each is based on the version the previous one produced
+    const save = saveChain.then(sendProject);
+    saveChain = save.catch(() => {});
+    return save;
+}
+
+async function sendProject() {
+    const current = snapshotDocument();
+    const fullBody = JSON.stringify({
+        version: projectVersion ?? undefined,
+        name: current.name,
+        content: JSON.stringify(current.components),
+        settings: JSON.stringify(current.settings)
+    });
+    
+    let body = fullBody;
+    if (savedDocument && projectVersion !== null) {
+        const patch = diffDocuments(savedDocument, current);
+        if (patch.length === 0) {
+            return { ok: true };
+        }
+        const patchBody = JSON.stringify({ version: projectVersion, patch });
+        if (patchBody.length < fullBody.length) {
+            body = patchBody;
+        }
+    }
+    
+    const response = await fetch(`/api/projects/${projectId}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/json' },
+        body
+    });
+    
+    const data = await response.json();
+    if (response.ok) {
+        projectVersion = data.version;
+        savedDocument = current;
+    }
+    return { ok: response.ok, conflict: response.status === 409, error: data.error };
+}
+
 async function saveProject() {
     clearTimeout(saveTimeout);
     saveTimeout = setTimeout(async () => {
@@ -509,24 +603,21 @@ async function saveProject() {
             saveStatus.textContent = 'Saving...';
             saveStatus.style.color = '#f59e0b';
             
-            const response = await fetch(`/api/projects/${projectId}`, {
-                method: 'PUT',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    name: projectTitle.value,
-                    content: JSON.stringify(components),
-                    settings: JSON.stringify(settings)
-                })
-            });
-            
-            if (response.ok) {
+            const result = await persistProject();
+            
+            if (result.ok) {
                 saveStatus.textContent = 'Saved';
                 saveStatus.style.color = '#10b981';
+            } else if (result.conflict) {
+                saveStatus.textContent = 'Conflict';
+                saveStatus.style.color = '#ef4444';
+                if (confirm('This project was changed in another tab or window. Reload the latest version? Unsaved changes here will be lost.')) {
+                    window.location.reload();
+                }
             } else {
-                const data = await response.json();
                 saveStatus.textContent = 'Error';
                 saveStatus.style.color = '#ef4444';
-                if (data.error) alert(data.error);
+                if (result.error) alert(result.error);
             }
         } catch (error) {
             saveStatus.textContent = 'Error';
@@ -2911,6 +3002,28 @@ async function handleGalleryImageUpload(index, event) {
     }
 }
 
+// Export Jobs
+const EXPORT_POLL_INTERVAL = 1500;
+const EXPORT_POLL_LIMIT = 400;  // about ten minutes, the server's job timeout
+
+async function runExportJob(format, minify) {
+    const response = await fetch(`/api/export/${projectId}/${format}/jobs${minify ? '?minify=1' : ''}`, { method: 'POST' });
+    let job = await response.json();
+    if (!response.ok) throw new Error(job.error || 'Export failed');
+    
+    // Short polls keep sync web workers free while the export pool renders
+    for (let polls = 0; job.status === 'queued'; polls++) {
+        if (polls >= EXPORT_POLL_LIMIT) throw new Error('Export timed out');
+        await new Promise(resolve => setTimeout(resolve, EXPORT_POLL_INTERVAL));
+        const poll = await fetch(`/api/export/jobs/${job.id}`);
+        job = await poll.json();
+        if (!poll.ok) throw new Error(job.error || 'Export failed');
+    }
+    
+    if (job.status !== 'done') throw new Error(job.error || 'Export failed');
+    return job;
+}
+
 // Theme
 function applyTheme() {
     document.getElementById('pageTitle').value = settings.title;
@@ -2965,27 +3078,13 @@ function setupEventListeners() {
     document.getElementById('previewBtn').addEventListener('click', async () => {
         try {
             // Save first to ensure latest changes
-            await fetch(`/api/projects/${projectId}`, {
-                method: 'PUT',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    name: projectTitle.value,
-                    content: JSON.stringify(components),
-                    settings: JSON.stringify(settings)
-                })
-            });
-            
-            // Then get the preview
-            const response = await fetch(`/api/export/${projectId}/html`);
-            const data = await response.json();
+            clearTimeout(saveTimeout);
+            await persistProject();
             
-            if (response.ok && data.html) {
-                const iframe = document.getElementById('previewFrame');
-                iframe.srcdoc = data.html;
-                document.getElementById('previewModal').style.display = 'flex';
-            } else {
-                alert('Failed to generate preview: ' + (data.error || 'Unknown error'));
-            }
+            // Then stream the preview straight into the frame
+            const iframe = document.getElementById('previewFrame');
+            iframe.src = `/api/export/${projectId}/html?stream=1`;
+            document.getElementById('previewModal').style.display = 'flex';
         } catch (error) {
             console.error('Preview error:', error);
             alert('Failed to generate preview. Check console for details.');
@@ -2995,12 +3094,22 @@ function setupEventListeners() {
     document.querySelectorAll('.export-option').forEach(btn => {
         btn.addEventListener('click', async () => {
             const format = btn.dataset.format;
-            
-            if (format === 'zip') {
-                window.location.href = `/api/export/${projectId}/zip`;
-                document.getElementById('exportModal').style.display = 'none';
+            const minify = document.getElementById('exportMinify').checked;
+            
+            if (format !== 'html') {
+                // Heavy exports run as background jobs; download once ready
+                try {
+                    saveStatus.textContent = 'Exporting...';
+                    const job = await runExportJob(format, minify);
+                    window.location.href = job.result_url;
+                    document.getElementById('exportModal').style.display = 'none';
+                } catch (error) {
+                    alert(error.message);
+                } finally {
+                    saveStatus.textContent = 'Saved';
+                }
             } else {
-                const response = await fetch(`/api/export/${projectId}/${format}`);
+                const response = await fetch(`/api/export/${projectId}/${format}${minify ? '?minify=1' : ''}`);
                 
                 if (response.ok) {
                     const data = await response.json();